@@ -0,0 +1,90 @@
+""" Time the line-oriented block scanner against the old regex classifier on adversarial input.
+
+Every input is a single huge block that almost matches a block type and
+fails on its last line, which is where backtracking regexes hurt most.
+
+Usage: python3 bench/bench_blocks.py [--mb SIZE] [--runs N]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from block_markdown import BlockType, scan_blocks
+
+
+def regex_markdown_to_blocks(markdown):
+    """ The original block splitter. """
+    blocks = markdown.split("\n\n")
+    return [block.strip() for block in blocks if block.strip() != ""]
+
+
+def regex_block_to_block_type(block):
+    """ The original regex based block classifier. """
+    if re.match(r"#{1,6} .*", block):
+        return BlockType.H
+    elif re.fullmatch(r"^```[\s\S]*```$", block):
+        return BlockType.CODE
+    elif re.search(r"^>.*(\n>.*)*$", block):
+        return BlockType.QUOTE
+    elif re.search(r"^- .*(\n- .*)*$", block):
+        return BlockType.UL
+    for i, line in enumerate(block.split("\n")):
+        if not line.startswith(f"{i+1}. "):
+            return BlockType.P
+    return BlockType.OL
+
+
+def regex_pipeline(markdown):
+    return [(block, regex_block_to_block_type(block))
+            for block in regex_markdown_to_blocks(markdown)]
+
+
+def scanner_pipeline(markdown):
+    return list(scan_blocks(markdown.split("\n")))
+
+
+def repeat_to_size(unit, size, tail):
+    return unit * (size // len(unit)) + tail
+
+
+def adversarial_inputs(size):
+    return {
+        "almost quote": repeat_to_size("> quoted line of text\n", size, "not quoted"),
+        "almost list": repeat_to_size("- list item text\n", size, "-not an item"),
+        "almost code": "```" + repeat_to_size("code ` line\n", size, "``"),
+        "hash lines": repeat_to_size("####### not a heading\n", size, "x"),
+        "many blocks": repeat_to_size("para\n\n> q\n\n- a\n- b\n\n", size, ""),
+    }
+
+
+def best_time(func, arg, runs):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mb", type=float, default=10)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    size = int(args.mb * 1024 * 1024)
+    print(f"{'input (' + str(args.mb) + ' MB)':<20}{'regex s':>10}{'scanner s':>12}{'scanner MB/s':>14}")
+    for name, markdown in adversarial_inputs(size).items():
+        if regex_pipeline(markdown) != scanner_pipeline(markdown):
+            raise SystemExit(f"{name}: scanner output differs from the regex pipeline")
+        old = best_time(regex_pipeline, markdown, args.runs)
+        new = best_time(scanner_pipeline, markdown, args.runs)
+        print(f"{name:<20}{old:>10.3f}{new:>12.3f}{len(markdown) / new / 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+""" Time the precompiled-pattern and table-driven hot paths against the originals.
+
+Reports the cost per call of each helper and per block of block_to_html_node
+on a synthetic corpus, see bench/corpus.py.
+
+Usage: python3 bench/bench_dispatch.py [corpus options] [--runs N]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+
+from corpus import add_arguments, generator_from_args
+from block_markdown import BlockType, scan_blocks, is_ordered_list
+from htmlnode import LeafNode, ParentNode, escape_text, intern_leaf
+from inline_markdown import extract_markdown_images, extract_markdown_links, text_to_textnodes
+from markdown_html import block_to_html_node, get_heading_tag
+from textnode import TextType, rebase_url, text_node_to_html_node
+
+
+def legacy_extract_markdown_images(text):
+    return re.findall(r"!\[(.*?)\]\((.*?)\)", text)
+
+
+def legacy_extract_markdown_links(text):
+    return re.findall(r"\[(.*?)\]\((.*?)\)", text)
+
+
+def legacy_get_heading_tag(text):
+    for i in range(6):
+        if text.startswith(f"{'#' * (i+1)} "):
+            return f"h{i+1}"
+    raise Exception("Heading improperly formatted.")
+
+
+def legacy_is_ordered_list(lines):
+    for i, line in enumerate(lines):
+        expected_prefix = f"{i+1}. "
+        if not line.startswith(expected_prefix):
+            return False
+    return True
+
+
+def legacy_text_node_to_html_node(text_node, basepath="/"):
+    """ text_node_to_html_node before the tag table, escaping like it does. """
+    match text_node.text_type:
+        case TextType.TEXT:
+            return intern_leaf(None, escape_text(text_node.text))
+        case TextType.BOLD:
+            return intern_leaf("b", escape_text(text_node.text))
+        case TextType.ITALIC:
+            return intern_leaf("i", escape_text(text_node.text))
+        case TextType.CODE:
+            return intern_leaf("code", escape_text(text_node.text))
+        case TextType.LINK:
+            return LeafNode("a", escape_text(text_node.text),
+                            {"href": rebase_url(text_node.url, basepath)})
+        case TextType.IMAGE:
+            return LeafNode("img", "", {"src": rebase_url(text_node.url, basepath), "alt": text_node.text})
+
+
+def legacy_text_to_children(text, basepath="/"):
+    return [legacy_text_node_to_html_node(node, basepath) for node in text_to_textnodes(text)]
+
+
+def legacy_block_to_html_node(block, basepath="/", block_type=None):
+    """ block_to_html_node before the dispatch tables, with its lstrip marker removal. """
+    match block_type:
+        case BlockType.P:
+            return ParentNode("p", legacy_text_to_children(block.replace("\n", " "), basepath))
+        case BlockType.H:
+            return ParentNode(legacy_get_heading_tag(block),
+                              legacy_text_to_children(block.lstrip("# "), basepath))
+        case BlockType.CODE:
+            return ParentNode("pre", [LeafNode("code", escape_text(block.strip("`\n")))])
+        case BlockType.QUOTE:
+            new_block = ""
+            for line in block.split("\n"):
+                new_block += line.lstrip("> ") + "\n"
+            return ParentNode("blockquote", legacy_text_to_children(new_block, basepath))
+        case BlockType.UL:
+            return ParentNode("ul", [ParentNode("li", legacy_text_to_children(line.lstrip("- "), basepath))
+                                     for line in block.split("\n")])
+        case BlockType.OL:
+            list_items = []
+            i = 1
+            for line in block.split("\n"):
+                line = line.lstrip(f"{i}. ")
+                i += 1
+                list_items.append(ParentNode("li", legacy_text_to_children(line, basepath)))
+            return ParentNode("ol", list_items)
+
+
+def per_call(func, args, runs):
+    """ Return best time over runs of calling func on every args tuple, in ns per call. """
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        for arg in args:
+            func(*arg)
+        best = min(best, time.perf_counter() - start)
+    return best / len(args) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--runs", type=int, default=9)
+    args = parser.parse_args()
+
+    documents = generator_from_args(args).documents()
+    blocks = [(block, "/site/", block_type) for markdown in documents
+              for block, block_type in scan_blocks(markdown.split("\n"))]
+    paragraphs = [(block,) for block, _, block_type in blocks if block_type == BlockType.P]
+    headings = [(block,) for block, _, block_type in blocks if block_type == BlockType.H]
+    lists = [(block.split("\n"),) for block, _, block_type in blocks
+             if block_type in (BlockType.OL, BlockType.P)]
+    text_nodes = [(node, "/site/") for text, in paragraphs for node in text_to_textnodes(text)]
+    print(f"Corpus: {len(documents)} pages, {len(blocks)} blocks")
+
+    cases = [
+        ("extract_markdown_images", legacy_extract_markdown_images, extract_markdown_images, paragraphs),
+        ("extract_markdown_links", legacy_extract_markdown_links, extract_markdown_links, paragraphs),
+        ("get_heading_tag", legacy_get_heading_tag, get_heading_tag, headings),
+        ("is_ordered_list", legacy_is_ordered_list, is_ordered_list, lists),
+        ("text_node_to_html_node", legacy_text_node_to_html_node, text_node_to_html_node, text_nodes),
+        ("block_to_html_node", legacy_block_to_html_node, block_to_html_node, blocks),
+    ]
+    print(f"{'ns per call':<26}{'original':>10}{'now':>10}{'speedup':>9}")
+    for name, legacy, current, calls in cases:
+        before = per_call(legacy, calls, args.runs)
+        after = per_call(current, calls, args.runs)
+        print(f"{name:<26}{before:>10.0f}{after:>10.0f}{before / after:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
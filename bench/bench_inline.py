@@ -0,0 +1,83 @@
+""" Compare the single-pass inline scanner with the old five-stage split pipeline.
+
+Also times the scanner alone on unclosed brackets, where the link and image
+regexes backtrack quadratically. Its time per bracket should stay flat.
+
+Usage: python3 bench/bench_inline.py [--runs N]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from textnode import TextNode, TextType
+from inline_markdown import (
+    text_to_textnodes,
+    split_nodes_delimiter,
+    split_nodes_image,
+    split_nodes_link,
+)
+
+
+def split_pipeline(text):
+    """ The original text_to_textnodes: one full pass per syntax element. """
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+def link_heavy(count):
+    return " ".join(f"see [link {i}](/blog/{i}) and ![img {i}](/images/{i}.png)"
+                    for i in range(count))
+
+
+def emphasis_heavy(count):
+    return " ".join(f"some **bold {i}** then _italic {i}_ and `code {i}`"
+                    for i in range(count))
+
+
+def unclosed_brackets(count):
+    return "[a " * count + "](b"
+
+
+INPUTS = {
+    "links x100": link_heavy(100),
+    "links x1000": link_heavy(1000),
+    "links x10000": link_heavy(10000),
+    "emphasis x100": emphasis_heavy(100),
+    "emphasis x1000": emphasis_heavy(1000),
+    "emphasis x10000": emphasis_heavy(10000),
+}
+
+ADVERSARIAL = {f"unclosed x{count}": unclosed_brackets(count)
+               for count in (2000, 8000, 16000, 64000)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'input':<16}{'pipeline ms':>14}{'scanner ms':>14}{'speedup':>10}")
+    for name, text in INPUTS.items():
+        if split_pipeline(text) != text_to_textnodes(text):
+            raise SystemExit(f"{name}: scanner output differs from the pipeline")
+        old = min(timeit.repeat(lambda: split_pipeline(text), number=1, repeat=args.runs))
+        new = min(timeit.repeat(lambda: text_to_textnodes(text), number=1, repeat=args.runs))
+        print(f"{name:<16}{old * 1000:>14.2f}{new * 1000:>14.2f}{old / new:>9.1f}x")
+
+    print()
+    print(f"{'input':<18}{'scanner ms':>12}{'us / bracket':>14}")
+    for name, text in ADVERSARIAL.items():
+        new = min(timeit.repeat(lambda: text_to_textnodes(text), number=1, repeat=args.runs))
+        print(f"{name:<18}{new * 1000:>12.2f}{new * 1e6 / text.count('['):>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+""" Report memory per node of converted pages, with the old dict based nodes and the slotted ones.
+
+Converts every markdown file under the content directory (repeated to get
+a stable measurement) and measures the allocations with tracemalloc.
+
+Usage: python3 bench/bench_memory.py [--content DIR] [--copies N]
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import htmlnode
+import inline_markdown
+import markdown_html
+import textnode
+from markdown_html import markdown_to_html_node
+
+
+class DictTextNode():
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+class DictHTMLNode():
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+class DictLeafNode(DictHTMLNode):
+    def __init__(self, tag, value, props=None):
+        super().__init__(tag, value, None, props)
+
+
+class DictParentNode(DictHTMLNode):
+    def __init__(self, tag, children, props=None):
+        super().__init__(tag, None, children, props)
+
+
+def dict_nodes():
+    """ Patch the converter to build nodes the way it did before __slots__ and interning. """
+    return [
+        mock.patch.object(inline_markdown, "TextNode", DictTextNode),
+        mock.patch.object(markdown_html, "ParentNode", DictParentNode),
+        mock.patch.object(markdown_html, "LeafNode", DictLeafNode),
+        mock.patch.object(textnode, "LeafNode", DictLeafNode),
+        mock.patch.object(textnode, "intern_leaf", DictLeafNode),
+    ]
+
+
+def read_corpus(content_dir, copies):
+    documents = []
+    for dir_path, _, file_names in os.walk(content_dir):
+        for name in sorted(file_names):
+            if name.endswith(".md"):
+                with open(os.path.join(dir_path, name)) as file:
+                    markdown = file.read()
+                # make every copy distinct so the block cache can't share subtrees
+                documents.extend(f"{markdown}\n\ncopy {i}" for i in range(copies))
+    return documents
+
+
+def walk(node):
+    yield node
+    for child in node.children or []:
+        yield from walk(child)
+
+
+def node_overhead(node):
+    """ Return bytes of the node object itself, plus its __dict__ if it has one. """
+    size = sys.getsizeof(node)
+    if hasattr(node, "__dict__"):
+        size += sys.getsizeof(node.__dict__)
+    return size
+
+
+def measure(documents):
+    """ Return (traced bytes, nodes, distinct node objects, bytes of node objects)
+     kept alive by converting documents.
+     """
+    htmlnode._interned_leaves.clear()
+    tracemalloc.start()
+    trees = [markdown_to_html_node(markdown, cache=None) for markdown in documents]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    nodes = [node for tree in trees for node in walk(tree)]
+    distinct = {id(node): node for node in nodes}
+    overhead = sum(node_overhead(node) for node in distinct.values())
+    return size, len(nodes), len(distinct), overhead
+
+
+def main():
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--content", default=os.path.join(root, "content"))
+    parser.add_argument("--copies", type=int, default=200)
+    args = parser.parse_args()
+
+    documents = read_corpus(args.content, args.copies)
+    patches = dict_nodes()
+    for patch in patches:
+        patch.start()
+    before = measure(documents)
+    for patch in patches:
+        patch.stop()
+    after = measure(documents)
+
+    print(f"{len(documents)} documents, {before[1]} nodes")
+    print(f"{'':<8}{'objects':>10}{'node bytes':>12}{'bytes/node':>12}{'total bytes':>14}")
+    for name, (size, nodes, distinct, overhead) in (("dict", before), ("slots", after)):
+        print(f"{name:<8}{distinct:>10}{overhead:>12}{overhead / nodes:>12.1f}{size:>14}")
+    print(f"memory per converted page: {before[0] / len(documents):.0f} -> "
+          f"{after[0] / len(documents):.0f} bytes ({after[0] / before[0]:.0%})")
+
+
+if __name__ == "__main__":
+    main()
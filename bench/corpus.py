@@ -0,0 +1,134 @@
+""" Synthetic markdown corpus generator for the benchmarks.
+
+Usage: python3 bench/corpus.py DEST [--pages N] [--blocks N] [--link-density F]
+                               [--list-length N] [--code-lines N] [--seed N]
+"""
+import argparse
+import os
+import random
+
+WORDS = ("the", "ring", "of", "power", "elves", "hobbit", "shire", "mountain", "road",
+         "went", "ever", "on", "and", "wizard", "tower", "river", "forest", "king")
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+DEFAULTS = {
+    "pages": 200,
+    "blocks": 40,
+    "link_density": 0.05,
+    "list_length": 8,
+    "code_lines": 12,
+    "seed": 1,
+}
+
+
+class CorpusGenerator():
+    """ Random but reproducible markdown pages.
+     link_density is the chance of each word being a link or an image.
+     """
+    def __init__(self, pages=200, blocks=40, link_density=0.05, list_length=8,
+                 code_lines=12, seed=1):
+        self.pages = pages
+        self.blocks = blocks
+        self.link_density = link_density
+        self.list_length = list_length
+        self.code_lines = code_lines
+        self.rng = random.Random(seed)
+
+    def words(self, count):
+        out = []
+        for _ in range(count):
+            word = self.rng.choice(WORDS)
+            roll = self.rng.random()
+            if roll < self.link_density * 0.8:
+                word = f"[{word}](/page/{self.rng.randrange(self.pages)})"
+            elif roll < self.link_density:
+                word = f"![{word}](/images/{word}.png)"
+            elif roll < self.link_density + 0.05:
+                word = f"**{word}**"
+            elif roll < self.link_density + 0.08:
+                word = f"_{word}_"
+            elif roll < self.link_density + 0.1:
+                word = f"`{word}`"
+            out.append(word)
+        return " ".join(out)
+
+    def block(self):
+        kind = self.rng.random()
+        if kind < 0.1:
+            return "#" * self.rng.randint(2, 6) + " " + self.words(5)
+        if kind < 0.2:
+            return "\n".join(f"- {self.words(8)}" for _ in range(self.list_length))
+        if kind < 0.3:
+            return "\n".join(f"{i + 1}. {self.words(8)}" for i in range(self.list_length))
+        if kind < 0.35:
+            return "\n".join(f"> {self.words(10)}" for _ in range(3))
+        if kind < 0.45:
+            lines = [f"    line_{i} = {self.rng.randrange(1000)}" for i in range(self.code_lines)]
+            return "```\n" + "\n".join(lines) + "\n```"
+        return "\n".join(self.words(15) for _ in range(self.rng.randint(1, 5)))
+
+    def page(self, number):
+        blocks = [f"# Page {number} {self.words(3)}"]
+        blocks.extend(self.block() for _ in range(self.blocks))
+        return "\n\n".join(blocks) + "\n"
+
+    def documents(self):
+        return [self.page(number) for number in range(self.pages)]
+
+    def write(self, dest):
+        """ Write a site under dest: content/, static/ and template.html. """
+        content = os.path.join(dest, "content")
+        static = os.path.join(dest, "static", "images")
+        os.makedirs(static, exist_ok=True)
+        for word in WORDS:
+            with open(os.path.join(static, f"{word}.png"), "wb") as file:
+                file.write(bytes(self.rng.randrange(256) for _ in range(256)))
+        with open(os.path.join(dest, "static", "index.css"), "w") as file:
+            file.write("body { margin: 0; }\n")
+        with open(os.path.join(dest, "template.html"), "w") as file:
+            file.write(TEMPLATE)
+        for number, markdown in enumerate(self.documents()):
+            page_dir = os.path.join(content, "page", str(number))
+            os.makedirs(page_dir, exist_ok=True)
+            with open(os.path.join(page_dir, "index.md"), "w") as file:
+                file.write(markdown)
+
+
+def add_arguments(parser):
+    parser.add_argument("--pages", type=int, default=DEFAULTS["pages"])
+    parser.add_argument("--blocks", type=int, default=DEFAULTS["blocks"],
+                        help="blocks per page")
+    parser.add_argument("--link-density", type=float, default=DEFAULTS["link_density"],
+                        help="chance of a word being a link or image")
+    parser.add_argument("--list-length", type=int, default=DEFAULTS["list_length"])
+    parser.add_argument("--code-lines", type=int, default=DEFAULTS["code_lines"],
+                        help="lines per code block")
+    parser.add_argument("--seed", type=int, default=DEFAULTS["seed"])
+
+
+def generator_from_args(args) -> CorpusGenerator:
+    return CorpusGenerator(args.pages, args.blocks, args.link_density, args.list_length,
+                           args.code_lines, args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("dest")
+    add_arguments(parser)
+    args = parser.parse_args()
+    generator_from_args(args).write(args.dest)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+""" Benchmark the parser and a full build on a synthetic corpus, and compare with the baseline.
+
+Exits with status 1 if a benchmark got slower than the baseline by more
+than the tolerance. Baselines are seconds on this machine, so they are
+kept out of git: the first run of a corpus records its baseline, refresh
+it with --update-baseline after a deliberate change.
+
+Usage: python3 bench/run_benchmarks.py [corpus options] [--runs N]
+                                       [--tolerance F] [--update-baseline]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+
+from corpus import add_arguments, generator_from_args
+from block_markdown import BlockType, scan_blocks
+from inline_markdown import text_to_textnodes
+from markdown_html import markdown_to_html_node
+import main as site
+
+
+def best_time(func, runs):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_markdown_to_html_node(documents, runs):
+    def convert():
+        for markdown in documents:
+            markdown_to_html_node(markdown, cache=None)
+    return best_time(convert, runs)
+
+
+def bench_text_to_textnodes(documents, runs):
+    paragraphs = [block.replace("\n", " ") for markdown in documents
+                  for block, block_type in scan_blocks(markdown.split("\n"))
+                  if block_type == BlockType.P]
+    def tokenize():
+        for text in paragraphs:
+            text_to_textnodes(text)
+    return best_time(tokenize, runs)
+
+
+def bench_full_build(generator, runs):
+    """ Time main() building the corpus from scratch in a temporary directory. """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        generator.write(tmp)
+        os.chdir(tmp)
+        try:
+            def build():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    site.main(["--force", "--no-cache"])
+            return best_time(build, runs)
+        finally:
+            os.chdir(cwd)
+
+
+def corpus_key(args):
+    return (f"pages={args.pages},blocks={args.blocks},links={args.link_density},"
+            f"lists={args.list_length},code={args.code_lines},seed={args.seed}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--baseline", default=os.path.join(BENCH_DIR, "baseline.json"))
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="allowed slowdown factor against the baseline (default: %(default)s)")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    generator = generator_from_args(args)
+    documents = generator.documents()
+    size = sum(len(markdown) for markdown in documents)
+    print(f"Corpus: {len(documents)} pages, {size / 1e6:.2f} MB")
+
+    results = {
+        "markdown_to_html_node": bench_markdown_to_html_node(documents, args.runs),
+        "text_to_textnodes": bench_text_to_textnodes(documents, args.runs),
+        "full build": bench_full_build(generator_from_args(args), args.runs),
+    }
+
+    try:
+        with open(args.baseline) as file:
+            baselines = json.load(file)
+    except FileNotFoundError:
+        baselines = {}
+    baseline = baselines.get(corpus_key(args), {})
+
+    regressions = []
+    print(f"{'benchmark':<24}{'seconds':>10}{'baseline':>10}{'ratio':>8}")
+    for name, seconds in results.items():
+        if name in baseline:
+            ratio = seconds / baseline[name]
+            flag = "  REGRESSION" if ratio > args.tolerance else ""
+            print(f"{name:<24}{seconds:>10.3f}{baseline[name]:>10.3f}{ratio:>8.2f}{flag}")
+            if flag:
+                regressions.append(name)
+        else:
+            print(f"{name:<24}{seconds:>10.3f}{'-':>10}{'-':>8}")
+
+    if args.update_baseline or not baseline:
+        baselines[corpus_key(args)] = results
+        with open(args.baseline, "w") as file:
+            json.dump(baselines, file, indent=1, sort_keys=True)
+        print(f"Baseline updated: {args.baseline}")
+    elif regressions:
+        print(f"Slower than baseline x{args.tolerance}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
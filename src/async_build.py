@@ -0,0 +1,107 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from staging import write_file
+
+
+class PipelineOptions():
+    """ Concurrency of each stage of the page pipeline, and the size of the
+     queues between them. Full queues make earlier stages wait, so at most
+     about readers + 2 * queue_size + renderers + writers pages are in memory.
+     With renderers > 1, pages are rendered in a pool of processes.
+     """
+    def __init__(self, readers=4, renderers=1, writers=4, queue_size=16):
+        # no readers would write nothing, no writers would wait forever
+        for name, value in (("readers", readers), ("renderers", renderers),
+                            ("writers", writers), ("queue_size", queue_size)):
+            if value < 1:
+                raise ValueError(f"pipeline {name} must be at least 1, not {value}")
+        self.readers = readers
+        self.renderers = renderers
+        self.writers = writers
+        self.queue_size = queue_size
+
+
+def read_file(path) -> str:
+    with open(path) as file:
+        return file.read()
+
+
+async def pipeline(pages, render, executor, options: PipelineOptions):
+    """ Read, render and write pages, a list of (from_path, dest_path), with
+     the stages running concurrently and connected by bounded queues.
+     render(from_path, markdown) returns (html, page) and runs in executor.
+     Return list of (from_path, dest_path, seconds, error, phases, page)
+     results like generate_page_task, error is None on success.
+     """
+    loop = asyncio.get_running_loop()
+    to_read = asyncio.Queue()
+    for item in pages:
+        to_read.put_nowait(item)
+    to_render = asyncio.Queue(maxsize=options.queue_size)
+    to_write = asyncio.Queue(maxsize=options.queue_size)
+    results = []
+
+    def failed(from_path, dest_path, start, e):
+        results.append((from_path, dest_path, time.perf_counter() - start,
+                        f"{type(e).__name__}: {e}", None, None))
+
+    async def reader():
+        while not to_read.empty():
+            from_path, dest_path = to_read.get_nowait()
+            start = time.perf_counter()
+            try:
+                markdown = await asyncio.to_thread(read_file, from_path)
+            except Exception as e:
+                failed(from_path, dest_path, start, e)
+                continue
+            await to_render.put((from_path, dest_path, start, markdown))
+
+    async def renderer():
+        while (item := await to_render.get()) is not None:
+            from_path, dest_path, start, markdown = item
+            try:
+                html, page = await loop.run_in_executor(executor, render, from_path, markdown)
+            except Exception as e:
+                failed(from_path, dest_path, start, e)
+                continue
+            await to_write.put((from_path, dest_path, start, html, page))
+
+    async def writer():
+        while (item := await to_write.get()) is not None:
+            from_path, dest_path, start, html, page = item
+            try:
+                await asyncio.to_thread(write_file, dest_path, html)
+            except Exception as e:
+                failed(from_path, dest_path, start, e)
+                continue
+            results.append((from_path, dest_path, time.perf_counter() - start, None, None, page))
+
+    readers = [asyncio.create_task(reader()) for _ in range(options.readers)]
+    renderers = [asyncio.create_task(renderer()) for _ in range(options.renderers)]
+    writers = [asyncio.create_task(writer()) for _ in range(options.writers)]
+    # each stage is told to stop once the stage before it has finished
+    await asyncio.gather(*readers)
+    for _ in renderers:
+        await to_render.put(None)
+    await asyncio.gather(*renderers)
+    for _ in writers:
+        await to_write.put(None)
+    await asyncio.gather(*writers)
+    return results
+
+
+def run_pipeline(pages, render, options: PipelineOptions=None):
+    """ Run pipeline on pages and return its results.
+     render must be picklable when options.renderers > 1.
+     """
+    if options is None:
+        options = PipelineOptions()
+    if options.renderers > 1:
+        executor = ProcessPoolExecutor(max_workers=options.renderers)
+    else:
+        # a thread keeps the event loop free to schedule reads and writes
+        executor = ThreadPoolExecutor(max_workers=1)
+    with executor:
+        return asyncio.run(pipeline(pages, render, executor, options))
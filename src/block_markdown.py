@@ -1,5 +1,4 @@
 from enum import Enum
-import re
 
 class BlockType(Enum):
     P = "paragraph"
@@ -11,38 +10,111 @@ class BlockType(Enum):
 
 
 def markdown_to_blocks(markdown: str) -> list[str]:
-    blocks = markdown.split("\n\n")
-    clean_blocks = []
-    for block in blocks:
-        block = block.strip()
-        if block != "":
-            clean_blocks.append(block)
+    """ Return list of blocks separated by blank lines, stripped of surrounding whitespace. """
+    return [block for block, _ in scan_blocks(markdown.split("\n"))]
 
-    return clean_blocks
+
+def scan_blocks(lines):
+    """ Yield (block, BlockType) for each block in an iterable of lines.
+     Lines are grouped and classified in a single pass. Blank lines end a
+     block, except inside a fenced code block that starts a block.
+     """
+    current = []
+    fenced = False
+    for line in lines:
+        if line.endswith("\n"):
+            line = line[:-1]
+        if fenced:
+            current.append(line)
+            if line.rstrip().endswith("```"):
+                fenced = False
+        elif not line or line.isspace():
+            if current:
+                yield finish_block(current)
+                current = []
+        else:
+            if not current and line.lstrip().startswith("```"):
+                stripped = line.strip()
+                # ```one line code``` is closed on the same line
+                fenced = len(stripped) < 6 or not stripped.endswith("```")
+            current.append(line)
+
+    if fenced:
+        # fence was never closed, split what it swallowed on blank lines as usual
+        swallowed, current = current, []
+        for line in swallowed:
+            if not line or line.isspace():
+                if current:
+                    yield finish_block(current)
+                    current = []
+            else:
+                current.append(line)
+    if current:
+        yield finish_block(current)
+
+
+def finish_block(lines: list[str]):
+    """ Return (block, BlockType) for the lines of a block, stripping surrounding whitespace. """
+    lines[0] = lines[0].lstrip()
+    lines[-1] = lines[-1].rstrip()
+    return "\n".join(lines), lines_to_block_type(lines)
 
 
 def block_to_block_type(block: str) -> BlockType:
-    if re.match(r"#{1,6} .*", block):
-        return BlockType.H
-    elif re.fullmatch(r"^```[\s\S]*```$", block):
-        return BlockType.CODE
-    elif re.search(r"^>.*(\n>.*)*$", block):
-        return BlockType.QUOTE
-    elif re.search(r"^- .*(\n- .*)*$", block):
-        return BlockType.UL
-    elif is_ordered_list(block):
-        return BlockType.OL
-    else:
-        return BlockType.P
+    return lines_to_block_type(block.split("\n"))
+
+
+def lines_to_block_type(lines: list[str]) -> BlockType:
+    """ Return BlockType of a block given as lines, without regular expressions.
+     Every type is told apart by the first character, so only one check runs.
+     """
+    first = lines[0]
+    match first[:1]:
+        case "#":
+            if heading_level(first):
+                return BlockType.H
+        case "`":
+            if (first.startswith("```") and lines[-1].endswith("```") and
+                    (len(lines) > 1 or len(first) >= 6)):
+                return BlockType.CODE
+        case ">":
+            for line in lines:
+                if not line.startswith(">"):
+                    return BlockType.P
+            return BlockType.QUOTE
+        case "-":
+            for line in lines:
+                if not line.startswith("- "):
+                    return BlockType.P
+            return BlockType.UL
+        case "1":
+            if is_ordered_list(lines):
+                return BlockType.OL
+    return BlockType.P
+
+
+# list item markers "1. ", "2. ", ... built once and extended for longer lists
+_ordered_prefixes = [f"{i}. " for i in range(1, 101)]
+
+
+def ordered_list_prefixes(count) -> list[str]:
+    """ Return list of at least count ordered list item markers. """
+    while len(_ordered_prefixes) < count:
+        _ordered_prefixes.append(f"{len(_ordered_prefixes) + 1}. ")
+    return _ordered_prefixes
 
 
 # Check if block is an ordered list with proper incrementing
-def is_ordered_list(block):
-    lines = block.split('\n')
-    
-    for i, line in enumerate(lines):
-        expected_prefix = f"{i+1}. "
-        if not line.startswith(expected_prefix):
+def is_ordered_list(lines):
+    for line, prefix in zip(lines, ordered_list_prefixes(len(lines))):
+        if not line.startswith(prefix):
             return False
-    
-    return True
\ No newline at end of file
+    return True
+
+
+def heading_level(line) -> int:
+    """ Return level of a heading line, 0 if it isn't one. """
+    level = len(line) - len(line.lstrip("#"))
+    if 1 <= level <= 6 and line[level:level + 1] == " ":
+        return level
+    return 0
@@ -0,0 +1,83 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from manifest import hash_file
+from staging import remove_file
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# outputs that get precompressed variants
+COMPRESSIBLE_EXTENSIONS = (".html", ".css")
+
+
+def gzip_compress(data: bytes) -> bytes:
+    # no timestamp, so the same output always compresses to the same bytes
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def brotli_compress(data: bytes) -> bytes:
+    return brotli.compress(data, quality=11)
+
+
+# content encoding: (file extension, compress function)
+ENCODINGS = {"gzip": (".gz", gzip_compress)}
+if brotli is not None:
+    ENCODINGS["br"] = (".br", brotli_compress)
+
+
+def compress_file(path, previous: dict):
+    """ Write the missing or outdated compressed variants of path next to it.
+     previous maps variant paths to their inputs in the last build.
+     Return list of (variant path, inputs, whether it was written).
+     """
+    digest = hash_file(path)
+    data = None
+    variants = []
+    for encoding, (extension, compress) in ENCODINGS.items():
+        variant_path = path + extension
+        inputs = {"encoding": encoding, "hash": digest}
+        if previous.get(variant_path) == inputs and os.path.isfile(variant_path):
+            variants.append((variant_path, inputs, False))
+            continue
+        if data is None:
+            with open(path, "rb") as file:
+                data = file.read()
+        # the old variant may be a hardlink to the live site
+        remove_file(variant_path)
+        with open(variant_path, "wb") as file:
+            file.write(compress(data))
+        variants.append((variant_path, inputs, True))
+    return variants
+
+
+def compress_outputs(manifest, jobs=None):
+    """ Precompress the html and css outputs recorded in manifest on a pool
+     of jobs threads, for servers that send .gz and .br files as they are.
+     Variants are recorded in manifest with the content hash of their output,
+     and only rewritten when it changes.
+     Return (number of variants written, number unchanged).
+     """
+    paths = [os.path.join(manifest.root, key) for key in manifest.new
+             if key.endswith(COMPRESSIBLE_EXTENSIONS)]
+    written = unchanged = 0
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = []
+        for path in paths:
+            previous = {}
+            for extension, _ in ENCODINGS.values():
+                key = manifest.key(path + extension)
+                if key in manifest.old:
+                    previous[path + extension] = manifest.old[key]
+            futures.append(pool.submit(compress_file, path, previous))
+        for future in futures:
+            for variant_path, inputs, was_written in future.result():
+                manifest.record(variant_path, inputs)
+                if was_written:
+                    written += 1
+                else:
+                    unchanged += 1
+    return written, unchanged
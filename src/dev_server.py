@@ -0,0 +1,66 @@
+import os
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+
+def snapshot(paths) -> dict:
+    """ Return {file path: (mtime_ns, size)} for files in paths, walking directories. """
+    files = {}
+    for path in paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            files[path] = (stat.st_mtime_ns, stat.st_size)
+            continue
+        for dir_path, _, file_names in os.walk(path):
+            for name in file_names:
+                file_path = os.path.join(dir_path, name)
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+                files[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def diff_snapshots(old: dict, new: dict):
+    """ Return (changed, removed) sets of paths between two snapshots.
+     Added files count as changed.
+     """
+    changed = {path for path, stat in new.items() if old.get(path) != stat}
+    removed = set(old) - set(new)
+    return changed, removed
+
+
+def watch(paths, on_change, interval=0.2, stop: threading.Event=None):
+    """ Poll paths every interval seconds and call on_change(changed, removed)
+     whenever files are added, modified or removed. Runs until stop is set.
+     """
+    stop = stop or threading.Event()
+    previous = snapshot(paths)
+    while not stop.wait(interval):
+        current = snapshot(paths)
+        changed, removed = diff_snapshots(previous, current)
+        previous = current
+        if changed or removed:
+            on_change(changed, removed)
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        # the build output is noisy enough already, log errors only
+        pass
+
+    def log_error(self, format, *args):
+        SimpleHTTPRequestHandler.log_message(self, format, *args)
+
+
+def start_server(directory, port=8888, host=""):
+    """ Serve directory over HTTP from a background thread. Return the server. """
+    handler = partial(QuietHandler, directory=directory)
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(f"Serving {directory} at http://{host or 'localhost'}:{server.server_port}/")
+    return server
+
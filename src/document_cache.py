@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import shutil
+from collections import OrderedDict
+
+from htmlnode import HTMLNode, LeafNode, ParentNode
+from markdown_html import markdown_to_html_node, HeadingIndex
+
+# a change to any of these invalidates every cached document
+PARSER_MODULES = ("block_markdown.py", "inline_markdown.py", "markdown_html.py",
+                  "textnode.py", "htmlnode.py", "document_cache.py")
+
+
+_parser_version = None
+
+
+def parser_version() -> str:
+    """ Return hash of the parser source code, used as the cache version key.
+     The source doesn't change while running, so it is hashed once per process.
+     """
+    global _parser_version
+    if _parser_version is not None:
+        return _parser_version
+    digest = hashlib.sha256()
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in PARSER_MODULES:
+        with open(os.path.join(src_dir, name), "rb") as file:
+            digest.update(file.read())
+    _parser_version = digest.hexdigest()[:16]
+    return _parser_version
+
+
+def node_to_data(node: HTMLNode):
+    """ Return JSON serializable list representing the node tree. """
+    if isinstance(node, ParentNode):
+        return [node.tag, [node_to_data(child) for child in node.children], node.props]
+    return [node.tag, node.value, node.props]
+
+
+def node_from_data(data) -> HTMLNode:
+    """ Return node tree from data made by node_to_data. """
+    tag, value, props = data
+    if isinstance(value, list):
+        return ParentNode(tag, [node_from_data(child) for child in value], props)
+    return LeafNode(tag, value, props)
+
+
+class DocumentCache():
+    """ Cache of markdown_to_html_node results keyed by a hash of the markdown.
+     Each entry holds the node tree and the document's heading index.
+     Entries live on disk under cache_dir, with an in-memory LRU in front.
+     """
+    def __init__(self, cache_dir, max_entries=256, max_bytes=256 * 1024 * 1024):
+        self.version = parser_version()
+        self.root = cache_dir
+        self.dir = os.path.join(cache_dir, self.version)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, markdown, basepath, anchors=False):
+        # heading ids are part of the node tree, so anchors get their own entries
+        return hashlib.sha256(f"{basepath}\0{anchors:d}\0{markdown}".encode()).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.dir, key[:2], key + ".json")
+
+    def get(self, markdown, basepath="/", headings: HeadingIndex=None):
+        """ Return cached node tree for markdown, or None.
+         The cached headings are added to headings, if given.
+         """
+        key = self.key(markdown, basepath, headings is not None and headings.anchors)
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            data = self.memory[key]
+        else:
+            path = self.entry_path(key)
+            try:
+                with open(path) as file:
+                    data = json.load(file)
+                os.utime(path)
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+            self.remember(key, data)
+        self.hits += 1
+        node_data, entries = data
+        if headings is not None:
+            for level, text, _ in entries:
+                headings.add(level, text)
+        return node_from_data(node_data)
+
+    def put(self, markdown, basepath, node: HTMLNode, headings: HeadingIndex):
+        key = self.key(markdown, basepath, headings.anchors)
+        data = [node_to_data(node), headings.entries]
+        self.remember(key, data)
+        path = self.entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write and rename so other build processes never see a partial entry
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(data, file, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def remember(self, key, data):
+        self.memory[key] = data
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def markdown_to_html_node(self, markdown, basepath="/",
+                              headings: HeadingIndex=None) -> HTMLNode:
+        """ Return markdown_to_html_node(markdown, basepath, headings=headings),
+         from the cache when possible.
+         """
+        if headings is None:
+            headings = HeadingIndex()
+        node = self.get(markdown, basepath, headings)
+        if node is None:
+            node = markdown_to_html_node(markdown, basepath, headings=headings)
+            self.put(markdown, basepath, node, headings)
+        return node
+
+    def prune(self):
+        """ Remove entries of other parser versions, then least recently used
+         entries until the cache fits in max_bytes. Return number of removed entries.
+         """
+        if not os.path.isdir(self.root):
+            return 0
+        for name in os.listdir(self.root):
+            if name != self.version:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+        entries = []
+        total = 0
+        for dir_path, _, file_names in os.walk(self.dir):
+            for name in file_names:
+                path = os.path.join(dir_path, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+                total += stat.st_size
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+
+_caches = {}
+
+
+def get_document_cache(cache_dir) -> DocumentCache:
+    """ Return the DocumentCache for cache_dir, opening it once per process. """
+    if cache_dir not in _caches:
+        _caches[cache_dir] = DocumentCache(cache_dir)
+    return _caches[cache_dir]
@@ -1,5 +1,35 @@
 
+from html import unescape
+
+
+def escape_text(text: str) -> str:
+    """ Return text with &, < and > escaped for HTML.
+     Text without them is returned as the same object, without a copy.
+     """
+    if "&" in text or "<" in text or ">" in text:
+        return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return text
+
+
+def escape_attribute(value: str) -> str:
+    """ Return value escaped for a double-quoted HTML attribute, the same object if clean. """
+    if "&" in value or "<" in value or ">" in value or '"' in value:
+        return (value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+                .replace('"', "&quot;"))
+    return value
+
+
+def unescape_text(html: str) -> str:
+    """ Return plain text of escaped html text, the same object if it has no entities. """
+    if "&" in html:
+        return unescape(html)
+    return html
+
+
 class HTMLNode():
+    # no per-instance __dict__, pages are made of a lot of nodes
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props:dict=None ):
         self.tag = tag
         self.value = value
@@ -8,14 +38,24 @@ class HTMLNode():
 
     def to_html(self):
         raise NotImplementedError("to_html method not implemented")
+
+    def iter_html(self):
+        """ Yield the node's HTML as fragments, without joining them. """
+        raise NotImplementedError("iter_html method not implemented")
+
+    def write_html(self, file):
+        """ Write the node's HTML to a text file or buffer fragment by fragment. """
+        file.writelines(self.iter_html())
     
     def props_to_html(self):
-        """ Return string that represents the HTML attributes of the node. """
+        """ Return string that represents the HTML attributes of the node.
+         Props hold plain values, they are escaped and quoted here.
+         """
         html = ""
         if not self.props:
             return html
         for prop in self.props:
-            html += f' {prop}="{self.props[prop]}"'
+            html += f' {prop}="{escape_attribute(self.props[prop])}"'
         return html
 
     def __repr__(self):
@@ -23,6 +63,11 @@ class HTMLNode():
     
 
 class LeafNode(HTMLNode):
+    """ Node with a value that is already HTML, text must be escaped with
+     escape_text before it is made into a leaf.
+     """
+    __slots__ = ()
+
     def __init__(self, tag, value, props:dict=None):
         super().__init__(tag, value, None, props)
 
@@ -33,26 +78,60 @@ class LeafNode(HTMLNode):
         if not self.tag:
             return self.value
         return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+
+    def iter_html(self):
+        yield self.to_html()
         
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
     
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children: list, props=None):
         super().__init__(tag, None, children, props)
 
     def to_html(self):
         """ Return ParentNode as HTML formatted string.
-         Recursively call children to get their HTML formatted strings.
+         Fragments of the whole subtree are joined once, instead of once per level.
          """
+        return "".join(self.iter_html())
+
+    def iter_html(self):
+        """ Yield opening tag, fragments of the children recursively, and closing tag. """
         if not self.tag:
             raise ValueError("parent node's tag missing")
         
         if not self.children:
             raise ValueError("parent node's children missing")
 
-        return f"<{self.tag}>{"".join(map(lambda child: child.to_html(), self.children))}</{self.tag}>"
+        yield f"<{self.tag}{self.props_to_html()}>"
+        for child in self.children:
+            yield from child.iter_html()
+        yield f"</{self.tag}>"
     
     def __repr__(self):
-        return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
\ No newline at end of file
+        return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
+
+
+# leaves with only a tag and a short value repeat a lot (" ", ", ", "and"),
+# since leaves are never modified one shared instance can stand in for all of them
+INTERN_MAX_VALUE = 32
+INTERN_MAX_ENTRIES = 65536
+_interned_leaves = {}
+
+
+def intern_leaf(tag, value) -> LeafNode:
+    """ Return shared LeafNode(tag, value) without props for short values,
+     a new LeafNode otherwise.
+     """
+    if len(value) > INTERN_MAX_VALUE:
+        return LeafNode(tag, value)
+    key = (tag, value)
+    node = _interned_leaves.get(key)
+    if node is None:
+        if len(_interned_leaves) >= INTERN_MAX_ENTRIES:
+            _interned_leaves.clear()
+        node = _interned_leaves[key] = LeafNode(tag, value)
+    return node
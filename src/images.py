@@ -0,0 +1,210 @@
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from urllib.parse import unquote, urlsplit
+
+from htmlnode import HTMLNode, LeafNode, ParentNode
+from static_sync import link_or_copy
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# widths of the resized copies made of images wider than them
+DERIVATIVE_WIDTHS = (480, 960, 1600)
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# JPEG start of frame markers, the others in C0-CF are DHT, JPG and DAC
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def image_size(path):
+    """ Return (width, height) of the PNG, GIF or JPEG image in path, read
+     from its header, or None if it isn't one of them or can't be read.
+     """
+    try:
+        with open(path, "rb") as file:
+            header = file.read(26)
+            if header.startswith(PNG_SIGNATURE) and header[12:16] == b"IHDR":
+                return struct.unpack(">II", header[16:24])
+            if header[:6] in (b"GIF87a", b"GIF89a"):
+                return struct.unpack("<HH", header[6:10])
+            if header.startswith(b"\xff\xd8"):
+                file.seek(2)
+                return jpeg_size(file)
+    except (OSError, struct.error):
+        pass
+    return None
+
+
+def jpeg_size(file):
+    """ Return (width, height) from the start of frame segment of a JPEG file
+     positioned after its start of image marker, or None if there is none.
+     """
+    while True:
+        marker = file.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        while code == 0xFF:
+            # fill bytes before the marker code
+            fill = file.read(1)
+            if not fill:
+                return None
+            code = fill[0]
+        if code == 0x01 or 0xD0 <= code <= 0xD8:
+            # markers without a segment
+            continue
+        if code == 0xD9:
+            # end of image
+            return None
+        (length,) = struct.unpack(">H", file.read(2))
+        if code in JPEG_SOF_MARKERS:
+            _, height, width = struct.unpack(">BHH", file.read(5))
+            return width, height
+        file.seek(length - 2, os.SEEK_CUR)
+
+
+def resize_image(src, dest, width):
+    """ Write a copy of image src scaled to width into dest. Run in pool workers. """
+    with Image.open(src) as image:
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp_path = f"{dest}.{os.getpid()}.tmp"
+        resized.save(tmp_path, format=image.format, optimize=True, quality=85)
+    os.replace(tmp_path, dest)
+
+
+class ResponsiveImages():
+    """ Adds width, height and loading="lazy" to the img nodes of pages whose
+     src is a file in static_dir, and a srcset of its resized derivatives.
+     Derivatives are only made when Pillow is installed, in every width of
+     widths smaller than the image, next to it as <name>-<width>w<extension>.
+     Sizes are read from the image headers once per instance.
+     """
+    def __init__(self, static_dir, basepath="/", widths=DERIVATIVE_WIDTHS):
+        self.static_dir = static_dir
+        self.basepath = basepath
+        self.widths = tuple(widths) if Image is not None else ()
+        self.sizes = {}
+
+    def settings(self) -> list:
+        """ Return what pages depend on besides the images, for the manifest. """
+        return list(self.widths)
+
+    def size(self, path):
+        if path not in self.sizes:
+            self.sizes[path] = image_size(path)
+        return self.sizes[path]
+
+    def static_path(self, url):
+        """ Return path of the static file root-relative url points to, or None. """
+        parts = urlsplit(url)
+        if parts.scheme or parts.netloc or not parts.path.startswith(self.basepath):
+            return None
+        path = unquote(parts.path[len(self.basepath):])
+        if not path or ".." in path.split("/"):
+            return None
+        path = os.path.join(self.static_dir, *path.split("/"))
+        return path if os.path.isfile(path) else None
+
+    def derivative_widths(self, size) -> list:
+        return [width for width in self.widths if width < size[0]]
+
+    def derivative_path(self, path, width) -> str:
+        """ Return path of the width wide derivative of path, relative to static_dir. """
+        stem, extension = os.path.splitext(os.path.relpath(path, self.static_dir))
+        return f"{stem}-{width}w{extension}"
+
+    def url(self, rel_path) -> str:
+        return self.basepath + rel_path.replace(os.sep, "/")
+
+    def image_node(self, node: HTMLNode, used: set) -> HTMLNode:
+        """ Return copy of img node with the responsive props, or node itself
+         if its src isn't a static image. The path of the image is added to used.
+         """
+        path = self.static_path(node.props.get("src", ""))
+        size = self.size(path) if path is not None else None
+        if size is None:
+            return node
+        used.add(path)
+        props = dict(node.props, width=str(size[0]), height=str(size[1]))
+        widths = self.derivative_widths(size)
+        if widths:
+            candidates = [f"{self.url(self.derivative_path(path, width))} {width}w"
+                          for width in widths]
+            candidates.append(f"{node.props['src']} {size[0]}w")
+            props["srcset"] = ", ".join(candidates)
+        props["loading"] = "lazy"
+        return LeafNode(node.tag, node.value, props)
+
+    def rewrite(self, node: HTMLNode, used: set) -> HTMLNode:
+        """ Return node tree with image_node applied to its img nodes. Nodes
+         may be shared with the block cache, so changed ones are copied
+         along with their parents instead of modified.
+         """
+        if node.children is None:
+            if node.tag == "img" and node.props:
+                return self.image_node(node, used)
+            return node
+        children = [self.rewrite(child, used) for child in node.children]
+        if all(new is old for new, old in zip(children, node.children)):
+            return node
+        return ParentNode(node.tag, children, node.props)
+
+    def iter_rewriting(self, nodes, used: set):
+        """ Yield nodes rewritten as they pass. """
+        for node in nodes:
+            yield self.rewrite(node, used)
+
+    def write_derivatives(self, paths, root, cache_dir, manifest, jobs=1, mode="auto"):
+        """ Put the derivatives of the images in paths into root, recording
+         them in manifest. Each derivative is resized once in a pool of jobs
+         processes and kept in cache_dir by the hash of its image and its
+         width, then linked or copied into place like static files.
+         Return (number of derivatives resized, number taken from the cache).
+         """
+        outputs = []
+        missing = {}
+        for path in sorted(paths):
+            size = self.size(path)
+            if size is None:
+                continue
+            digest = manifest.file_hash(path)
+            extension = os.path.splitext(path)[1]
+            for width in self.derivative_widths(size):
+                dest_path = os.path.join(root, self.derivative_path(path, width))
+                inputs = {"image": path, "hash": digest, "width": width}
+                if manifest.is_fresh(dest_path, inputs):
+                    manifest.record(dest_path, inputs)
+                    continue
+                cached = os.path.join(cache_dir, digest[:2], f"{digest}-{width}w{extension}")
+                outputs.append((cached, dest_path, inputs))
+                if not os.path.isfile(cached):
+                    missing[cached] = (path, width)
+
+        resized = 0
+        if missing:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                futures = {pool.submit(resize_image, path, cached, width): cached
+                           for cached, (path, width) in missing.items()}
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                        resized += 1
+                    except Exception as e:
+                        path, width = missing[futures[future]]
+                        print(f"Failed to resize {path} to {width}: {type(e).__name__}: {e}")
+
+        reused = 0
+        for cached, dest_path, inputs in outputs:
+            if not os.path.isfile(cached):
+                continue
+            if cached not in missing:
+                reused += 1
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            link_or_copy(cached, dest_path, mode)
+            manifest.record(dest_path, inputs)
+        return resized, reused
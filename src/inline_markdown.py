@@ -2,17 +2,110 @@ import re
 
 from textnode import TextType, TextNode
 
+IMAGE_PATTERN = re.compile(r"!\[(.*?)\]\((.*?)\)")
+LINK_PATTERN = re.compile(r"\[(.*?)\]\((.*?)\)")
+
+# applied in this order, text inside an earlier delimiter is never split by a later one
+INLINE_DELIMITERS = (("**", TextType.BOLD), ("_", TextType.ITALIC), ("`", TextType.CODE))
+
+
 def text_to_textnodes(text: str):
-    """ Return list of TextNodes (bold, italic, code, image, and link types) based on the input string. """
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    """ Return list of TextNodes (bold, italic, code, image, and link types) based on the input string.
+     Scans the text left to right in a single pass, producing the same nodes
+     as running split_nodes_delimiter for **, _ and `, then split_nodes_image
+     and split_nodes_link.
+     """
+    nodes = []
+    scan_delimiters(text, 0, len(text), 0, nodes)
     return nodes
 
 
+def scan_delimiters(text, start, end, level, nodes):
+    """ Append TextNodes for text[start:end] to nodes.
+     Pairs of INLINE_DELIMITERS[level] become nodes of its type, the runs
+     between them are scanned for the next delimiter level, then for images
+     and links.
+     """
+    if level == len(INLINE_DELIMITERS):
+        scan_images(text, start, end, nodes)
+        return
+    delimiter, text_type = INLINE_DELIMITERS[level]
+    size = len(delimiter)
+    pos = start
+    while True:
+        opening = text.find(delimiter, pos, end)
+        if opening == -1:
+            scan_delimiters(text, pos, end, level + 1, nodes)
+            return
+        closing = text.find(delimiter, opening + size, end)
+        if closing == -1:
+            raise Exception("invalid Markdown syntax, no closing delimiter")
+        scan_delimiters(text, pos, opening, level + 1, nodes)
+        if closing > opening + size:
+            nodes.append(TextNode(text[opening + size:closing], text_type))
+        pos = closing + size
+
+
+def scan_images(text, start, end, nodes):
+    """ Append image TextNodes found in text[start:end], scanning the text between them for links. """
+    pos = start
+    for match_start, match_end, alt, url in scan_bracketed(text, "![", start, end):
+        scan_links(text, pos, match_start, nodes)
+        nodes.append(TextNode(alt, TextType.IMAGE, url))
+        pos = match_end
+    scan_links(text, pos, end, nodes)
+
+
+def scan_links(text, start, end, nodes):
+    """ Append link and plain text TextNodes found in text[start:end]. """
+    pos = start
+    for match_start, match_end, anchor, url in scan_bracketed(text, "[", start, end):
+        if match_start > pos:
+            nodes.append(TextNode(text[pos:match_start], TextType.TEXT))
+        nodes.append(TextNode(anchor, TextType.LINK, url))
+        pos = match_end
+    if end > pos:
+        nodes.append(TextNode(text[pos:end], TextType.TEXT))
+
+
+def scan_bracketed(text, opener, start, end):
+    """ Yield (start, end, label, url) of each opener label](url) in text[start:end],
+     the same matches IMAGE_PATTERN or LINK_PATTERN find, in linear time.
+     The next "](", ")" and newline are remembered and only searched for
+     again once the scan has passed them, so every search moves forward
+     however many openers are left unclosed.
+     """
+    size = len(opener)
+    pos = start
+    middle = closing = newline = -1
+    while True:
+        opening = text.find(opener, pos, end)
+        if opening == -1:
+            return
+        label = opening + size
+        if middle < label:
+            middle = text.find("](", label, end)
+            if middle == -1:
+                return
+        if newline < label:
+            newline = text.find("\n", label, end)
+            if newline == -1:
+                newline = end
+        if newline < middle:
+            # no match can start before a newline that comes before "]("
+            pos = newline + 1
+            continue
+        if closing < middle + 2:
+            closing = text.find(")", middle + 2, end)
+            if closing == -1:
+                return
+        if newline < closing:
+            pos = newline + 1
+            continue
+        yield opening, closing + 1, text[label:middle], text[middle + 2:closing]
+        pos = closing + 1
+
+
 def split_nodes_delimiter(old_nodes: list[TextNode], delimiter: str, text_type: TextType):
     """ Return a list of TextNodes created by splitting the old_nodes with the delimiter. """
     new_nodes = []
@@ -88,7 +181,7 @@ def split_nodes_link(old_nodes: list[TextNode]):
     return new_nodes
 
 def extract_markdown_images(text):
-    return re.findall(r"!\[(.*?)\]\((.*?)\)", text)
+    return IMAGE_PATTERN.findall(text)
 
 def extract_markdown_links(text):
-    return re.findall(r"\[(.*?)\]\((.*?)\)", text)
\ No newline at end of file
+    return LINK_PATTERN.findall(text)
\ No newline at end of file
@@ -0,0 +1,135 @@
+import json
+import os
+import posixpath
+from urllib.parse import unquote, urlsplit
+
+from htmlnode import HTMLNode
+
+
+def collect_links(node: HTMLNode, links=None) -> list:
+    """ Return list of ["link", href] and ["image", src] of the a and img
+     nodes in the node tree, in document order.
+     """
+    if links is None:
+        links = []
+    if node.children is not None:
+        for child in node.children:
+            collect_links(child, links)
+    elif node.props:
+        if node.tag == "a" and "href" in node.props:
+            links.append(["link", node.props["href"]])
+        elif node.tag == "img" and "src" in node.props:
+            links.append(["image", node.props["src"]])
+    return links
+
+
+def iter_collecting_links(nodes, links: list):
+    """ Yield nodes, adding the links of each to links as it passes. """
+    for node in nodes:
+        collect_links(node, links)
+        yield node
+
+
+def link_targets(url, page_key, basepath="/"):
+    """ Return tuple of output paths, relative to the public directory, any of
+     which satisfies url on the page page_key. Empty for external urls and
+     links within the page.
+     """
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return ()
+    path = unquote(parts.path)
+    if path.startswith("/"):
+        # urls were rebased when the page was converted
+        if path.startswith(basepath):
+            path = path[len(basepath):]
+        else:
+            path = path[1:]
+    else:
+        path = posixpath.join(posixpath.dirname(page_key.replace(os.sep, "/")), path)
+    path = posixpath.normpath(path) if path else ""
+    if path in ("", "."):
+        return ("index.html",)
+    if path.startswith(".."):
+        return ("..",)
+    if parts.path.endswith("/"):
+        return (posixpath.join(path, "index.html"),)
+    return (path, posixpath.join(path, "index.html"))
+
+
+class LinkIndex():
+    """ Site-wide index of the links and images on every page, kept between builds.
+     Pages are keyed like the BuildManifest, by output path relative to root,
+     and each entry remembers the inputs it was extracted from.
+     """
+    version = 1
+
+    def __init__(self, path, root, pages: dict=None):
+        self.path = path
+        self.root = root
+        self.old = pages or {}
+        self.new = {}
+
+    @classmethod
+    def load(cls, path, root):
+        """ Return index stored in path, or an empty one if missing or unreadable. """
+        try:
+            with open(path) as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return cls(path, root)
+        if data.get("version") != cls.version:
+            return cls(path, root)
+        return cls(path, root, data.get("pages", {}))
+
+    def save(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w") as file:
+            json.dump({"version": self.version, "pages": self.new}, file,
+                      indent=1, sort_keys=True)
+
+    def key(self, dest_path):
+        return os.path.relpath(dest_path, self.root)
+
+    def is_current(self, dest_path, inputs: dict) -> bool:
+        """ Return True if the links of dest_path were extracted from inputs. """
+        entry = self.old.get(self.key(dest_path))
+        return entry is not None and entry["inputs"] == inputs
+
+    def record(self, dest_path, source_path, inputs: dict, links: list):
+        self.new[self.key(dest_path)] = {"source": source_path, "inputs": inputs,
+                                         "links": links}
+
+    def keep_previous(self, dest_path):
+        """ Carry the previous build's links of dest_path over to this build. """
+        key = self.key(dest_path)
+        if key in self.old:
+            self.new[key] = self.old[key]
+
+    def check(self, outputs, basepath="/"):
+        """ Return list of (source path, kind, url) for internal links and
+         images whose target isn't among outputs, paths relative to root.
+         """
+        outputs = {output.replace(os.sep, "/") for output in outputs}
+        broken = []
+        for key, entry in sorted(self.new.items()):
+            for kind, url in entry["links"]:
+                targets = link_targets(url, key, basepath)
+                if targets and not any(target in outputs for target in targets):
+                    broken.append((entry["source"], kind, url))
+        return broken
+
+    def backlinks(self, outputs, basepath="/") -> dict:
+        """ Return dict mapping paths in outputs to sorted list of source paths
+         of the pages linking to them.
+         """
+        outputs = {output.replace(os.sep, "/") for output in outputs}
+        sources = {}
+        for key, entry in self.new.items():
+            for _, url in entry["links"]:
+                for target in link_targets(url, key, basepath):
+                    if target in outputs:
+                        sources.setdefault(target, set()).add(entry["source"])
+                        break
+        return {target: sorted(paths) for target, paths in sources.items()}
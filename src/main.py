@@ -1,73 +1,400 @@
 import os
 import sys
 import shutil
-from re import findall
+import time
+import argparse
+import threading
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-from markdown_html import markdown_to_html_node
+from markdown_html import (markdown_to_html_node, iter_block_nodes, block_cache, HeadingIndex,
+                           collect_headings)
+from htmlnode import ParentNode, escape_text
+from document_cache import get_document_cache, parser_version
+from manifest import BuildManifest
+from link_index import LinkIndex, collect_links, iter_collecting_links
+from search_index import SearchIndexBuilder, count_terms, iter_counting_terms
+from static_sync import SYNC_MODES, sync_static_files, sync_file
+from async_build import PipelineOptions, run_pipeline
+from shard import Shard
+from images import ResponsiveImages
+from compress import ENCODINGS, compress_outputs
+from staging import OutputWriter, clone_tree, remove_file, staging_path, swap_into_place
+from template import load_template
+from dev_server import start_server, watch
+import profiler
+from profiler import BuildProfile, TimedNode
 
 
-def copy_static_files(from_dir_path, dest_dir_path):
-    """ Copy everything from_dir_path to dest_dir_path. """
-    for item in os.listdir(from_dir_path):
-        src = os.path.join(from_dir_path, item)
-        dst = os.path.join(dest_dir_path, item)
-        if os.path.isfile(src):
-            print(f"Copying file: {src} -> {dst}")
-            shutil.copy(src, dst)
-        else:
-            #print(f"-> {src}")
-            os.mkdir(dst)
-            copy_static_files(src, dst)
+def copy_static_files(from_dir_path, dest_dir_path, manifest=None, mode="auto"):
+    """ Copy everything from_dir_path to dest_dir_path.
+     With a manifest, files whose size, mtime or content hasn't changed are skipped.
+     Files are reflinked or hardlinked where possible, see static_sync.link_or_copy.
+     """
+    counts = sync_static_files(from_dir_path, dest_dir_path, manifest, mode)
+    print("Static files: " +
+          ", ".join(f"{count} {method}" for method, count in sorted(counts.items())))
 
 
 def extract_title(markdown):
-    """ Return text of the first h1 level heading (#). """
-    title = findall(r"(?m)^# (.*)", markdown)
-    if len(title) == 0:
-        raise Exception("no h1 header for title")
-    return title[0]
+    """ Return text of the first h1 level heading (#), the title pages get. """
+    return collect_headings(markdown.splitlines()).title()
 
 
-def generate_page(from_path, template_path, dest_path, basepath):
-    """ Convert markdown file in from_path to html file in dest_path. """
+def generate_page(from_path, template_path, dest_path, basepath, cache=None, stream=None,
+                  writer=None, toc=False, search=False, images=None):
+    """ Convert markdown file in from_path to html file in dest_path.
+     The compiled template and the content are streamed to disk in one write.
+     The title comes from the heading index collected during the conversion.
+     With toc, headings get slug ids and the template's {{ TOC }} slot a
+     list of links to them, otherwise the slot is left empty.
+     With an OutputWriter, the page is rendered and written by its threads,
+     and the destination directory must already exist.
+     With a DocumentCache, unchanged markdown isn't parsed again.
+     With ResponsiveImages, img nodes of static images get their size and srcset.
+     Files larger than stream_threshold, or any file with stream=True, are
+     read and written block by block instead.
+     Return dict of what was learned about the page: its "title" and "links",
+     with search the frequencies of the words in it as "terms", and with
+     images the sorted paths of the static images it shows as "images".
+     """
     print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    with open(from_path) as file:
-        markdown = file.read()
-    with open(template_path) as file:
-        template = file.read()
-    
-    content = markdown_to_html_node(markdown).to_html()
-    #content = "test"
-    title = extract_title(markdown)
+    if stream is None:
+        stream = os.path.getsize(from_path) > stream_threshold
+    if stream:
+        return generate_page_streaming(from_path, template_path, dest_path, basepath, toc,
+                                       search, images)
+    with profiler.phase("markdown read"):
+        with open(from_path) as file:
+            markdown = file.read()
+    template = load_template(template_path, basepath)
+    values, page = render_page(markdown, basepath, cache, toc, search, images)
+
+    if writer is None and not os.path.exists(os.path.dirname(dest_path)):
+        os.makedirs(os.path.dirname(dest_path))
+
+    write_page(dest_path, template, values, writer)
+    return page
+
+
+def render_page(markdown, basepath, cache=None, toc=False, search=False, images=None):
+    """ Convert markdown of a page. Return (values, page) where values fill
+     the template and page is the dict generate_page returns.
+     """
+    headings = HeadingIndex(anchors=toc)
+    if cache is not None:
+        content = cache.markdown_to_html_node(markdown, basepath, headings)
+    else:
+        content = markdown_to_html_node(markdown, basepath, headings=headings)
+    title = headings.title()
+    if images is not None:
+        used = set()
+        content = images.rewrite(content, used)
+    values = {"Title": escape_text(title), "Content": content,
+              "TOC": headings.toc_node() if toc else ""}
+    page = {"title": title, "links": collect_links(content)}
+    if search:
+        page["terms"] = count_terms(content)
+    if images is not None:
+        page["images"] = sorted(used)
+    return values, page
+
+
+def render_page_task(template_path, basepath, cache_dir, toc, search, images, from_path,
+                     markdown):
+    """ Render stage of the async pipeline, return (html, page) of markdown from from_path. """
+    print(f"Generating page from {from_path} using {template_path}")
+    template = load_template(template_path, basepath)
+    cache = get_document_cache(cache_dir) if cache_dir else None
+    values, page = render_page(markdown, basepath, cache, toc, search, images)
+    return template.render(values), page
+
 
-    html = template.replace("{{ Title }}", title)
-    html = html.replace("{{ Content }}", content)
-    html = html.replace('href="/', f'href="{basepath}')
-    html = html.replace('src="/', f'src="{basepath}')
+def write_page(dest_path, template, values, writer=None):
+    """ Render template with values into dest_path, timing the phases when profiling.
+     An existing dest_path is unlinked first, it may be a hardlink to the live site.
+     """
+    profile = profiler.active
+    if profile is None:
+        if writer is not None:
+            # the writer thread renders the fragments straight into the file
+            writer.write(dest_path, template.iter_render(values))
+            return
+        remove_file(dest_path)
+        with open(dest_path, 'w') as file:
+            template.write(file, values)
+        return
+    values = dict(values, Content=TimedNode(values["Content"], profile))
+    profile.start("file write")
+    remove_file(dest_path)
+    file = open(dest_path, 'w')
+    profile.stop()
+    try:
+        with profile.phase("template render"):
+            template.write(file, values)
+    finally:
+        with profile.phase("file write"):
+            file.close()
+
+
+def generate_page_streaming(from_path, template_path, dest_path, basepath, toc=False,
+                            search=False, images=None):
+    """ Convert markdown file in from_path to html file in dest_path one block
+     at a time, so memory use is bounded by the largest block, not the file.
+     """
+    template = load_template(template_path, basepath)
+    with open(from_path) as file:
+        # the title and TOC come before the content, find them with a first read
+        headings = collect_headings(file, basepath, anchors=toc)
+        title = headings.title()
+        toc_node = headings.toc_node() if toc else ""
 
     if not os.path.exists(os.path.dirname(dest_path)):
         os.makedirs(os.path.dirname(dest_path))
 
-    with open(dest_path, 'w') as file:
-        file.write(html)
+    page = {"title": title, "links": []}
+    with open(from_path) as source:
+        # caching blocks of a huge one-off document would only cost memory
+        blocks = iter_block_nodes(source, basepath, cache=None,
+                                  headings=HeadingIndex(toc) if toc else None)
+        if images is not None:
+            used = set()
+            blocks = images.iter_rewriting(blocks, used)
+        blocks = iter_collecting_links(blocks, page["links"])
+        if search:
+            page["terms"] = {}
+            blocks = iter_counting_terms(blocks, page["terms"])
+        content = ParentNode("div", blocks)
+        write_page(dest_path, template,
+                   {"Title": escape_text(title), "Content": content, "TOC": toc_node})
+    if images is not None:
+        page["images"] = sorted(used)
+    return page
     
 
-def generate_pages_recursively(dir_path_content, template_path, dest_dir_path, basepath):
-    """ Call generate_content on all files in dir_path_content. """
+def collect_pages(dir_path_content, dest_dir_path):
+    """ Walk dir_path_content once and return list of (markdown path, html path)
+     pairs. Missing destination directories are created along the way.
+     """
+    pages = []
     for item in os.listdir(dir_path_content):
         content_path = os.path.join(dir_path_content, item)
         dest_path = os.path.join(dest_dir_path, item)
         if os.path.isfile(content_path):
             if content_path.endswith(".md"):
-                generate_page(content_path,
-                              template_path,
-                              dest_path.replace(".md", ".html"),
-                              basepath)
+                pages.append((content_path, dest_path.replace(".md", ".html")))
             else:
                 print(f"Skipping non-markdown file: {content_path}")
         else:
-            os.mkdir(dest_path)
-            generate_pages_recursively(content_path, template_path, dest_path, basepath)
+            os.makedirs(dest_path, exist_ok=True)
+            pages.extend(collect_pages(content_path, dest_path))
+    return pages
+
+
+def get_page_inputs(manifest, content_path, template_path, basepath, toc=False, includes=(),
+                    images=None):
+    """ Return the manifest inputs of the page generated from content_path:
+     the hashes of its source, template and included files, and the basepath,
+     parser version and options it was built with.
+     """
+    files = {content_path: manifest.file_hash(content_path),
+             template_path: manifest.file_hash(template_path)}
+    for path in includes:
+        files[path] = manifest.file_hash(path)
+    inputs = {"source": content_path, "files": files, "basepath": basepath,
+              "parser": parser_version()}
+    if toc:
+        inputs["toc"] = True
+    if images is not None:
+        inputs["images"] = images.settings()
+    return inputs
+
+
+def previous_includes(manifest, dest_path, content_path, template_path) -> list:
+    """ Return the files other than its source and template that dest_path
+     was built from in the previous build and that still exist. A page is
+     only parsed once it is known to be stale, so its current includes are
+     checked against the ones it had.
+     """
+    files = manifest.old.get(manifest.key(dest_path), {}).get("files", {})
+    return [path for path in files
+            if path not in (content_path, template_path) and os.path.isfile(path)]
+
+
+def generate_page_task(from_path, template_path, dest_path, basepath, cache_dir=None,
+                       stream=None, profile=False, toc=False, search=False, images=None):
+    """ Run generate_page in a pool worker.
+     Return tuple (from_path, dest_path, seconds, error, phases, page) where
+     error is None on success or a description of the exception that was
+     raised, phases is (phase seconds, phase calls) of the page when profiling
+     and page is what generate_page returned.
+     """
+    if profile:
+        profiler.install(BuildProfile())
+    start = time.perf_counter()
+    page = None
+    try:
+        cache = get_document_cache(cache_dir) if cache_dir else None
+        page = generate_page(from_path, template_path, dest_path, basepath, cache, stream,
+                             toc=toc, search=search, images=images)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    seconds = time.perf_counter() - start
+    phases = None
+    if profile:
+        phases = (dict(profiler.active.phases), dict(profiler.active.calls))
+        profiler.uninstall()
+    return from_path, dest_path, seconds, error, phases, page
+
+
+def generate_pages_parallel(pages, template_path, basepath, jobs, cache_dir=None,
+                            stream=None, profile=False, toc=False, search=False,
+                            images=None):
+    """ Generate pages in a pool of jobs worker processes.
+     Return list of (from_path, dest_path, seconds, error, phases, page) results.
+     """
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(generate_page_task, from_path, template_path,
+                               dest_path, basepath, cache_dir, stream, profile, toc,
+                               search, images):
+                   (from_path, dest_path)
+                   for from_path, dest_path in pages}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # the worker process itself died, blame only its page
+                from_path, dest_path = futures[future]
+                results.append((from_path, dest_path, 0.0, f"{type(e).__name__}: {e}", None,
+                                None))
+    return results
+
+
+def print_slowest_pages(results, count=5):
+    """ Print the count pages that took the longest to generate. """
+    slowest = sorted(results, key=lambda result: result[2], reverse=True)[:count]
+    print("Slowest pages:")
+    for from_path, _, seconds, _, _, _ in slowest:
+        print(f"  {seconds * 1000:8.1f} ms  {from_path}")
+
+
+def generate_pages_recursively(dir_path_content, template_path, dest_dir_path, basepath,
+                               manifest=None, jobs=1, cache_dir=None, stream=None,
+                               profile=None, toc=False, links=None, search=None,
+                               explain=False, pipeline=None, shard=None, images=None):
+    """ Call generate_content on all files in dir_path_content.
+     With a manifest, pages whose source, template and basepath haven't
+     changed since the last build are skipped.
+     With jobs > 1, pages are generated in a process pool and failures are
+     reported per page instead of stopping the build.
+     With cache_dir, parsed documents are cached there between builds.
+     With a BuildProfile, page timings and the phases of pool workers are added to it.
+     With toc, pages get heading ids and a table of contents.
+     With a LinkIndex and a manifest, the links of every page are recorded in
+     it and checked against the outputs once all pages are done, pages whose
+     links aren't in the index are regenerated even if fresh.
+     With a SearchIndexBuilder and a manifest, the terms of every page are
+     added to it, again regenerating fresh pages whose terms aren't cached.
+     With explain, the reason each page is or isn't regenerated is printed.
+     With PipelineOptions, pages are read, rendered and written by the async
+     pipeline instead, except those that are streamed.
+     With a Shard, only its share of the pages is generated and links are
+     left to be checked when the shards are merged.
+     With ResponsiveImages, the static images of a page are recorded among
+     its includes in the manifest, so changing one regenerates the page.
+     Return list of (from_path, error) for pages that failed.
+     """
+    pages = []
+    page_inputs = {}
+    all_pages = collect_pages(dir_path_content, dest_dir_path)
+    if shard is not None:
+        all_pages = shard.select(all_pages, dir_path_content)
+    for content_path, dest_path in all_pages:
+        if manifest is not None:
+            includes = previous_includes(manifest, dest_path, content_path, template_path)
+            inputs = get_page_inputs(manifest, content_path, template_path, basepath, toc,
+                                     includes, images)
+            reasons = []
+            if not manifest.is_fresh(dest_path, inputs):
+                reasons = manifest.explain(dest_path, inputs)
+            elif links is not None and not links.is_current(dest_path, inputs):
+                reasons = ["links not in the link index"]
+            elif search is not None and not search.add(dest_path, inputs):
+                reasons = ["words not in the search cache"]
+            if explain:
+                print(f"Rebuilding {content_path}: {'; '.join(reasons)}" if reasons else
+                      f"Up to date: {content_path}")
+            if not reasons:
+                manifest.record(dest_path, inputs)
+                if links is not None:
+                    links.keep_previous(dest_path)
+                continue
+            page_inputs[dest_path] = inputs
+        pages.append((content_path, dest_path))
+
+    if pipeline is not None and pages:
+        streamed = [item for item in pages
+                    if stream or (stream is None and os.path.getsize(item[0]) > stream_threshold)]
+        results = [generate_page_task(from_path, template_path, dest_path, basepath, cache_dir,
+                                      True, toc=toc, search=search is not None,
+                                      images=images)
+                   for from_path, dest_path in streamed]
+        render = partial(render_page_task, template_path, basepath, cache_dir, toc,
+                         search is not None, images)
+        results += run_pipeline([item for item in pages if item not in streamed], render,
+                                pipeline)
+    elif jobs > 1 and len(pages) > 1:
+        results = generate_pages_parallel(pages, template_path, basepath, jobs,
+                                          cache_dir=cache_dir, stream=stream,
+                                          profile=profile is not None, toc=toc,
+                                          search=search is not None, images=images)
+    else:
+        results = []
+        cache = get_document_cache(cache_dir) if cache_dir else None
+        with OutputWriter() as writer:
+            for content_path, dest_path in pages:
+                start = time.perf_counter()
+                page = generate_page(content_path, template_path, dest_path, basepath, cache,
+                                     stream=stream, writer=writer, toc=toc,
+                                     search=search is not None, images=images)
+                results.append((content_path, dest_path, time.perf_counter() - start,
+                                None, None, page))
+
+    failures = []
+    for content_path, dest_path, seconds, error, phases, page in results:
+        if profile is not None:
+            profile.add_page(content_path, seconds, os.path.getsize(content_path))
+            if phases is not None:
+                profile.merge(*phases)
+        if error is not None:
+            print(f"Failed to generate {content_path}: {error}")
+            failures.append((content_path, error))
+            if manifest is not None:
+                manifest.keep_previous(dest_path)
+            if links is not None:
+                links.keep_previous(dest_path)
+            if search is not None and manifest is not None:
+                previous = dict(manifest.old.get(manifest.key(dest_path), {}))
+                previous.pop("failed", None)
+                search.add(dest_path, previous)
+        elif manifest is not None:
+            inputs = page_inputs[dest_path]
+            if images is not None:
+                inputs = get_page_inputs(manifest, content_path, template_path, basepath, toc,
+                                         page["images"], images)
+            manifest.record(dest_path, inputs)
+            if links is not None:
+                links.record(dest_path, content_path, inputs, page["links"])
+            if search is not None:
+                search.add_page(dest_path, inputs, page["title"], page["terms"])
+    if jobs > 1 and results and profile is None:
+        print_slowest_pages(results)
+    if links is not None and manifest is not None and shard is None:
+        for source_path, kind, url in links.check(manifest.new, basepath):
+            print(f"Broken {kind} in {source_path}: {url}")
+    return failures
 
 
 dir_path_static = "static"
@@ -75,25 +402,397 @@ dir_path_public = "docs"
 dir_path_content = "content"
 template_path = "template.html"
 default_basepath = "/"
+manifest_path = ".cache/manifest.json"
+link_index_path = ".cache/links.json"
+search_cache_dir = ".cache/search"
+document_cache_dir = ".cache/documents"
+image_cache_dir = ".cache/images"
+shard_dir_path = ".cache/shards"
+# markdown files bigger than this are converted block by block
+stream_threshold = 32 * 1024 * 1024
+
+
+def parse_args(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == "serve":
+        parser = argparse.ArgumentParser(prog="main.py serve",
+                                         description="Build the site and serve it locally.")
+        parser.add_argument("--watch", action="store_true",
+                            help="rebuild pages affected by changes to content, static files or the template")
+        parser.add_argument("--port", type=int, default=8888)
+        parser.add_argument("--interval", type=float, default=0.2,
+                            help="seconds between polls for changes (default: %(default)s)")
+        args = parser.parse_args(argv[1:])
+        args.command = "serve"
+        args.basepath = default_basepath
+        return args
+    if argv and argv[0] == "merge":
+        parser = argparse.ArgumentParser(prog="main.py merge",
+                                         description="Combine the shards of a sharded build "
+                                                     "into the public directory.")
+        parser.add_argument("count", type=int, help="number of shards the site was built in")
+        parser.add_argument("basepath", nargs="?", default=default_basepath,
+                            help="site's root path (default: %(default)s)")
+        parser.add_argument("--search-index", action="store_true",
+                            help="write a search index of all shards, which must have been "
+                                 "built with --search-index")
+        args = parser.parse_args(argv[1:])
+        args.command = "merge"
+        return args
 
+    parser = argparse.ArgumentParser(description="Generate the site from markdown content.",
+                                     epilog="Run 'main.py serve --watch' for a development server.")
+    parser.add_argument("basepath", nargs="?", default=default_basepath,
+                        help="site's root path (default: %(default)s)")
+    parser.add_argument("--force", action="store_true",
+                        help="ignore the build manifest and rebuild everything")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of worker processes generating pages, 0 for one per CPU")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="don't use or update the parsed document cache")
+    parser.add_argument("--stream", action="store_const", const=True, default=None,
+                        help="convert every page block by block, not only files over "
+                             f"{stream_threshold // (1024 * 1024)} MB")
+    parser.add_argument("--profile", action="store_true",
+                        help="report time spent per build phase and the slowest pages")
+    parser.add_argument("--profile-json", metavar="PATH",
+                        help="write the profile report as JSON to PATH")
+    parser.add_argument("--profile-slowest", metavar="N", type=int, default=10,
+                        help="number of slowest pages in the profile (default: %(default)s)")
+    parser.add_argument("--static-mode", choices=SYNC_MODES, default="auto",
+                        help="how static files are put in place, auto tries reflink, "
+                             "hardlink and copy in turn (default: %(default)s)")
+    parser.add_argument("--toc", action="store_true",
+                        help="give headings slug ids and fill the template's {{ TOC }} slot")
+    parser.add_argument("--search-index", action="store_true",
+                        help="write a full-text search index of the pages under "
+                             f"{dir_path_public}/{SearchIndexBuilder.dir_name}/")
+    parser.add_argument("--explain", action="store_true",
+                        help="print why each page is or isn't rebuilt")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="read, render and write pages in concurrent stages, "
+                             "for slow or network file systems")
+    parser.add_argument("--pipeline-readers", type=positive_int, default=4,
+                        help="pipeline files read at once (default: %(default)s)")
+    parser.add_argument("--pipeline-renderers", type=positive_int, default=1,
+                        help="pipeline render processes, 1 renders in a thread "
+                             "(default: %(default)s)")
+    parser.add_argument("--pipeline-writers", type=positive_int, default=4,
+                        help="pipeline files written at once (default: %(default)s)")
+    parser.add_argument("--pipeline-queue", type=positive_int, default=16,
+                        help="pages waiting between pipeline stages (default: %(default)s)")
+    parser.add_argument("--responsive-images", action="store_true",
+                        help="give images their width and height, lazy loading and, when "
+                             "Pillow is installed, a srcset of resized copies")
+    parser.add_argument("--precompress", action="store_true",
+                        help="write .gz, and with the brotli module .br, variants of every "
+                             "html and css output")
+    parser.add_argument("--shard", type=shard_argument, metavar="K/N",
+                        help=f"build only shard K of N into {shard_dir_path}/K-of-N/, "
+                             "to be combined with 'main.py merge N'")
+    args = parser.parse_args(argv)
+    args.command = "build"
+    return args
 
-def main():
-    if len(sys.argv) < 2:
-        basepath = default_basepath
+
+def positive_int(text):
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"must be a whole number, not {text!r}")
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {value}")
+    return value
+
+
+def shard_argument(text):
+    try:
+        return Shard.parse(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def state_paths(shard=None):
+    """ Return (public directory, manifest, link index, search cache, document cache)
+     paths of the whole site, or of a shard kept apart under shard_dir_path.
+     """
+    if shard is None:
+        return (dir_path_public, manifest_path, link_index_path, search_cache_dir,
+                document_cache_dir)
+    shard_dir = os.path.join(shard_dir_path, shard.name)
+    return (os.path.join(shard_dir, "docs"), os.path.join(shard_dir, "manifest.json"),
+            os.path.join(shard_dir, "links.json"), os.path.join(shard_dir, "search"),
+            os.path.join(shard_dir, "documents"))
+
+
+def build(basepath, force=False, jobs=1, cache_dir=document_cache_dir, stream=None,
+          profile=None, static_mode="auto", toc=False, search_index=False, explain=False,
+          pipeline=None, shard=None, responsive_images=False, precompress=False):
+    """ Build the public directory incrementally.
+     The site is built in a staging directory, a hardlinked clone of the
+     public directory, that replaces it only when the build has finished,
+     so the public directory is never empty or half-written.
+     Links and images of every page are indexed in link_index_path and the
+     broken ones reported.
+     With search_index, a search index of the pages is written as well.
+     Return (manifest, failures) where failures lists pages that failed.
+     With a BuildProfile, the build's phases are timed into it.
+     With a Shard, its pages are built into a directory of its own with its
+     own manifest and caches, see state_paths, for merge_shards to combine.
+     With responsive_images, the static images pages show are given their
+     size and resized copies, cached in image_cache_dir.
+     With precompress, html and css outputs get compressed variants next to them.
+     """
+    public, manifest_file, links_file, search_dir, documents_dir = state_paths(shard)
+    if cache_dir and shard is not None:
+        cache_dir = documents_dir
+    staging = staging_path(public)
+    if os.path.exists(staging):
+        print("Removing staging directory of an unfinished build...")
+        shutil.rmtree(staging)
+    manifest = None
+    if not force:
+        manifest = BuildManifest.load(manifest_file, staging)
+    if manifest is None:
+        print("Building into an empty staging directory...")
+        manifest = BuildManifest(manifest_file, staging)
+        links = LinkIndex(links_file, staging)
     else:
-        basepath = sys.argv[1]
-    print(f"Site's root path set as: {basepath}")
-    
-    print("Clearing public directory...")
-    if os.path.exists(dir_path_public):
-        shutil.rmtree(dir_path_public)
-    os.mkdir(dir_path_public)
+        print("Found build manifest, rebuilding changed files only...")
+        links = LinkIndex.load(links_file, staging)
+        if os.path.exists(public):
+            clone_tree(public, staging)
+    os.makedirs(staging, exist_ok=True)
+
+    if shard is None or shard.number == 1:
+        print("Copying static files to staging directory...")
+        with profiler.phase("static copy"):
+            copy_static_files(dir_path_static, staging, manifest, static_mode)
 
-    print("Copying static files to public directory...")
-    copy_static_files(dir_path_static, dir_path_public)
+    search = None
+    if search_index:
+        search = SearchIndexBuilder(search_dir, staging, basepath)
+    images = None
+    if responsive_images:
+        images = ResponsiveImages(dir_path_static, basepath)
+        if not images.widths:
+            print("Pillow isn't installed, images get their size but no resized copies")
 
     print("Generating content...")
-    generate_pages_recursively(dir_path_content, template_path, dir_path_public, basepath)
+    failures = generate_pages_recursively(dir_path_content, template_path, staging, basepath,
+                                          manifest=manifest, jobs=jobs, cache_dir=cache_dir,
+                                          stream=stream, profile=profile, toc=toc,
+                                          links=links, search=search, explain=explain,
+                                          pipeline=pipeline, shard=shard, images=images)
+
+    if images is not None and images.widths:
+        with profiler.phase("images"):
+            used = {path for inputs in manifest.new.values() for path in inputs.get("files", ())
+                    if path.startswith(dir_path_static + os.sep)}
+            resized, cached = images.write_derivatives(used, staging, image_cache_dir, manifest,
+                                                       jobs, static_mode)
+            print(f"Image derivatives: {resized} resized, {cached} from cache")
+
+    if search is not None:
+        with profiler.phase("search index"):
+            # a shard only caches the words of its pages for merge_shards
+            if shard is None and search.write(manifest):
+                print(f"Wrote search index of {len(search.pages)} pages")
+            search.prune()
+
+    if precompress:
+        with profiler.phase("compression"):
+            written, unchanged = compress_outputs(manifest)
+            print(f"Compressed variants ({', '.join(ENCODINGS)}): "
+                  f"{written} written, {unchanged} unchanged")
+
+    manifest.remove_stale_outputs()
+    print("Replacing public directory...")
+    swap_into_place(staging, public)
+    manifest.root = public
+    manifest.save()
+    links.root = public
+    links.save()
+    if cache_dir:
+        get_document_cache(cache_dir).prune()
+    return manifest, failures
+
+
+def merge_shards(count, basepath, search_index=False):
+    """ Combine the outputs, manifests and link indexes of shards 1 to count
+     into the public directory, hardlinking the shards' files into a fresh
+     staging directory, and check the links of the whole site.
+     With search_index, the search index is written from the words the
+     shards cached, which are copied into search_cache_dir so that a build
+     of the whole site afterwards finds them. Return the merged manifest.
+     """
+    staging = staging_path(dir_path_public)
+    if os.path.exists(staging):
+        shutil.rmtree(staging)
+    manifest = BuildManifest(manifest_path, staging)
+    links = LinkIndex(link_index_path, staging)
+    search = None
+    if search_index:
+        search = SearchIndexBuilder(search_cache_dir, staging, basepath)
+    os.makedirs(staging)
+    for number in range(1, count + 1):
+        shard = Shard(number, count)
+        public, manifest_file, links_file, search_dir, _ = state_paths(shard)
+        shard_manifest = BuildManifest.load(manifest_file, public)
+        if shard_manifest is None or not os.path.isdir(public):
+            shutil.rmtree(staging)
+            raise Exception(f"shard {number}/{count} hasn't been built")
+        print(f"Merging shard {number}/{count}...")
+        clone_tree(public, staging)
+        manifest.new.update(shard_manifest.old)
+        links.new.update(LinkIndex.load(links_file, public).old)
+        if search is not None:
+            shard_search = SearchIndexBuilder(search_dir, public, basepath)
+            for key, inputs in shard_manifest.old.items():
+                if "files" not in inputs:
+                    continue
+                entry_path = shard_search.entry_path(os.path.join(public, key), inputs)
+                if not os.path.isfile(entry_path):
+                    shutil.rmtree(staging)
+                    raise Exception(f"shard {number}/{count} has no words cached for "
+                                    f"{inputs['source']}, build it with --search-index")
+                search.add_copy(os.path.join(staging, key), inputs, entry_path)
+
+    if search is not None:
+        search.write(manifest)
+        print(f"Wrote search index of {len(search.pages)} pages")
+        search.prune()
+    for source_path, kind, url in links.check(manifest.new, basepath):
+        print(f"Broken {kind} in {source_path}: {url}")
+    print("Replacing public directory...")
+    swap_into_place(staging, dir_path_public)
+    manifest.root = dir_path_public
+    manifest.save()
+    links.root = dir_path_public
+    links.save()
+    return manifest
+
+
+def page_dest_path(content_path):
+    """ Return path of the html file generated from content_path. """
+    rel_path = os.path.relpath(content_path, dir_path_content)
+    return os.path.join(dir_path_public, rel_path).replace(".md", ".html")
+
+
+def rebuild_changed(changed, removed, basepath, manifest):
+    """ Regenerate only the outputs affected by changed and removed input files,
+     found through the dependency graph in the manifest, which holds the
+     outputs of the build in the public directory. The link index is updated
+     with the regenerated pages, so the next build finds their links current.
+     """
+    links = LinkIndex.load(link_index_path, dir_path_public)
+    links.new.update(links.old)
+    for path in changed | removed:
+        manifest.hashes.pop(path, None)
+
+    pages = set()
+    for path in sorted(changed):
+        pages.update(inputs["source"] for _, inputs in manifest.dependents(path))
+        if path.startswith(dir_path_content + os.sep) and path.endswith(".md"):
+            pages.add(path)
+        elif path.startswith(dir_path_static + os.sep):
+            dst = os.path.join(dir_path_public, os.path.relpath(path, dir_path_static))
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            inputs, method = sync_file(path, dst, manifest.new.get(manifest.key(dst)))
+            if method is not None:
+                print(f"Copying file: {path} -> {dst} ({method})")
+            manifest.record(dst, inputs)
+
+    for path in sorted(removed):
+        if path.startswith(dir_path_content + os.sep) and path.endswith(".md"):
+            manifest.remove_output(page_dest_path(path))
+            links.new.pop(links.key(page_dest_path(path)), None)
+        elif path.startswith(dir_path_static + os.sep):
+            manifest.remove_output(os.path.join(dir_path_public,
+                                                os.path.relpath(path, dir_path_static)))
+
+    cache = get_document_cache(document_cache_dir)
+    for content_path in sorted(pages):
+        dest_path = page_dest_path(content_path)
+        try:
+            page = generate_page(content_path, template_path, dest_path, basepath, cache)
+        except Exception as e:
+            print(f"Failed to generate {content_path}: {type(e).__name__}: {e}")
+            continue
+        inputs = get_page_inputs(manifest, content_path, template_path, basepath)
+        manifest.record(dest_path, inputs)
+        links.record(dest_path, content_path, inputs, page["links"])
+    for source_path, kind, url in links.check(manifest.new, basepath):
+        print(f"Broken {kind} in {source_path}: {url}")
+    manifest.save()
+    links.save()
+
+
+def serve(args):
+    """ Build the site, serve the public directory and optionally keep rebuilding it. """
+    manifest, _ = build(args.basepath)
+    server = start_server(dir_path_public, args.port)
+    try:
+        if not args.watch:
+            threading.Event().wait()
+        print(f"Watching {dir_path_content}, {dir_path_static} and {template_path} for changes...")
+
+        def on_change(changed, removed):
+            start = time.perf_counter()
+            rebuild_changed(changed, removed, args.basepath, manifest)
+            info = block_cache.info()
+            print(f"Rebuilt in {(time.perf_counter() - start) * 1000:.1f} ms "
+                  f"(block cache: {info['hits']} hits, {info['misses']} misses)")
+
+        watch([dir_path_content, dir_path_static, template_path], on_change, args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "serve":
+        serve(args)
+        return
+    if args.command == "merge":
+        merge_shards(args.count, args.basepath, args.search_index)
+        return
+    basepath = args.basepath
+    jobs = args.jobs or os.cpu_count() or 1
+    print(f"Site's root path set as: {basepath}")
+
+    cache_dir = None if args.no_cache else document_cache_dir
+    pipeline = None
+    if args.pipeline:
+        pipeline = PipelineOptions(args.pipeline_readers, args.pipeline_renderers,
+                                   args.pipeline_writers, args.pipeline_queue)
+    profile = None
+    if args.profile or args.profile_json:
+        profile = BuildProfile()
+        profiler.install(profile)
+    start = time.perf_counter()
+    try:
+        _, failures = build(basepath, force=args.force, jobs=jobs, cache_dir=cache_dir,
+                            stream=args.stream, profile=profile,
+                            static_mode=args.static_mode, toc=args.toc,
+                            search_index=args.search_index, explain=args.explain,
+                            pipeline=pipeline, shard=args.shard,
+                            responsive_images=args.responsive_images,
+                            precompress=args.precompress)
+    finally:
+        profiler.uninstall()
+    if profile is not None:
+        elapsed = time.perf_counter() - start
+        if args.profile:
+            print(profile.report(elapsed, args.profile_slowest))
+        if args.profile_json:
+            profile.write_json(args.profile_json, elapsed, args.profile_slowest)
+    if failures:
+        print(f"{len(failures)} page(s) failed to generate")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+
+
+def hash_file(path) -> str:
+    """ Return sha256 hex digest of the file in path. """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildManifest():
+    """ Persistent record of the inputs every output file was built from.
+     Outputs are keyed by their path relative to the public directory root.
+     Page inputs form the dependency graph of the site: "files" maps every
+     file a page was built from (source, template, includes) to its hash,
+     and the other keys hold the settings it depends on.
+     """
+    version = 2
+
+    def __init__(self, path, root, entries: dict=None):
+        self.path = path
+        self.root = root
+        self.old = entries or {}
+        self.new = {}
+        self.hashes = {}
+
+    @classmethod
+    def load(cls, path, root):
+        """ Return manifest stored in path, or None if missing or unreadable. """
+        try:
+            with open(path) as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != cls.version:
+            return None
+        return cls(path, root, data.get("outputs", {}))
+
+    def save(self):
+        """ Write the outputs recorded during this build to disk. """
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w") as file:
+            json.dump({"version": self.version, "outputs": self.new}, file,
+                      indent=1, sort_keys=True)
+
+    def key(self, dest_path):
+        return os.path.relpath(dest_path, self.root)
+
+    def file_hash(self, path):
+        """ Return content hash of path, hashing each file only once per build. """
+        if path not in self.hashes:
+            self.hashes[path] = hash_file(path)
+        return self.hashes[path]
+
+    def is_fresh(self, dest_path, inputs: dict) -> bool:
+        """ Return True if dest_path exists and was built from the same inputs. """
+        return (self.old.get(self.key(dest_path)) == inputs and
+                os.path.isfile(dest_path))
+
+    def explain(self, dest_path, inputs: dict) -> list:
+        """ Return list of reasons why dest_path is out of date with inputs,
+         empty if it is fresh.
+         """
+        old = self.old.get(self.key(dest_path))
+        if old is None:
+            return ["not in the previous build"]
+        reasons = []
+        if old.get("failed"):
+            reasons.append("failed in the previous build")
+        old_files = old.get("files", {})
+        files = inputs.get("files", {})
+        for path in sorted(old_files.keys() | files.keys()):
+            if path not in old_files:
+                reasons.append(f"new dependency {path}")
+            elif path not in files:
+                reasons.append(f"no longer depends on {path}")
+            elif old_files[path] != files[path]:
+                reasons.append(f"{path} changed")
+        for name in sorted((old.keys() | inputs.keys()) - {"files", "failed"}):
+            if old.get(name) != inputs.get(name):
+                reasons.append(f"{name} changed from {old.get(name)!r} to {inputs.get(name)!r}")
+        if not reasons and not os.path.isfile(dest_path):
+            reasons.append("output file is missing")
+        return reasons
+
+    def dependents(self, path) -> list:
+        """ Return list of (output path, inputs) of this build's outputs that depend on file path. """
+        return [(os.path.join(self.root, key), inputs) for key, inputs in self.new.items()
+                if path in inputs.get("files", ())]
+
+    def record(self, dest_path, inputs: dict):
+        self.new[self.key(dest_path)] = inputs
+
+    def keep_previous(self, dest_path):
+        """ Carry the previous build's record of dest_path over to this build,
+         so an output that failed to regenerate is neither deleted nor trusted.
+         """
+        key = self.key(dest_path)
+        if key in self.old:
+            self.new[key] = dict(self.old[key], failed=True)
+
+    def remove_output(self, dest_path):
+        """ Delete dest_path and forget it, for outputs whose source was removed. """
+        self.new.pop(self.key(dest_path), None)
+        if os.path.isfile(dest_path):
+            print(f"Removing stale output: {dest_path}")
+            os.remove(dest_path)
+            remove_empty_dirs(os.path.dirname(dest_path), self.root)
+
+    def remove_stale_outputs(self):
+        """ Delete outputs of the previous build that this build didn't produce.
+         Return list of removed paths.
+         """
+        removed = []
+        for key in self.old:
+            if key in self.new:
+                continue
+            path = os.path.join(self.root, key)
+            if os.path.isfile(path):
+                print(f"Removing stale output: {path}")
+                os.remove(path)
+                removed.append(path)
+                remove_empty_dirs(os.path.dirname(path), self.root)
+        return removed
+
+
+def remove_empty_dirs(dir_path, root):
+    """ Remove dir_path and its parents up to root while they are empty. """
+    root = os.path.abspath(root)
+    dir_path = os.path.abspath(dir_path)
+    while dir_path != root and dir_path.startswith(root):
+        if os.listdir(dir_path):
+            return
+        os.rmdir(dir_path)
+        dir_path = os.path.dirname(dir_path)
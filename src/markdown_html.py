@@ -1,57 +1,222 @@
-from block_markdown import BlockType, markdown_to_blocks, block_to_block_type
+from collections import OrderedDict
+
+from block_markdown import (BlockType, scan_blocks, block_to_block_type, heading_level,
+                            ordered_list_prefixes)
 from inline_markdown import text_to_textnodes
 from textnode import text_node_to_html_node
-from htmlnode import HTMLNode, ParentNode, LeafNode
+from htmlnode import HTMLNode, ParentNode, LeafNode, escape_text, unescape_text
+
+
+class BlockCache():
+    """ LRU cache mapping (block text, basepath) to the block's HTMLNode subtree.
+     Cached subtrees are shared between documents, so they must not be modified.
+     It holds max_entries blocks, or all blocks of the largest document
+     converted through it if that has more, see reserve.
+     """
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.nodes = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        node = self.nodes.get(key)
+        if node is None:
+            self.misses += 1
+            return None
+        self.nodes.move_to_end(key)
+        self.hits += 1
+        return node
+
+    def put(self, key, node):
+        self.nodes[key] = node
+        if len(self.nodes) > self.max_entries:
+            self.nodes.popitem(last=False)
+
+    def reserve(self, count):
+        """ Grow to hold at least count entries. Called with the number of
+         blocks converted so far, so a document never evicts its own blocks
+         and an edited long document still finds its unchanged ones.
+         """
+        if count > self.max_entries:
+            self.max_entries = count
+
+    def clear(self):
+        self.nodes.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.nodes)}
+
+
+# shared by every call in this process, so unchanged blocks of an edited page are reused
+block_cache = BlockCache()
+
+
+class HeadingIndex():
+    """ Headings of a document in order, as (level, text, slug) entries,
+     collected while the document is converted. Text is plain, not HTML.
+     With anchors, heading nodes get their slug as id for the TOC to link to.
+     """
+    def __init__(self, anchors=False, entries=None):
+        self.anchors = anchors
+        self.entries = []
+        self.slugs = set()
+        for level, text, _ in entries or []:
+            self.add(level, text)
+
+    def add(self, level, text) -> str:
+        """ Record a heading and return its slug, unique within the document. """
+        base = slugify(text) or "section"
+        slug = base
+        count = 0
+        while slug in self.slugs:
+            count += 1
+            slug = f"{base}-{count}"
+        self.slugs.add(slug)
+        self.entries.append((level, text, slug))
+        return slug
+
+    def add_node(self, node: HTMLNode) -> HTMLNode:
+        """ Record heading node and return it, or with anchors a copy with an id.
+         The node may be shared through the BlockCache, so it isn't modified.
+         """
+        text = unescape_text("".join(child.value for child in node.children if child.value))
+        slug = self.add(int(node.tag[1]), text)
+        if not self.anchors:
+            return node
+        return ParentNode(node.tag, node.children, {"id": slug})
+
+    def title(self) -> str:
+        """ Return text of the first h1 level heading. """
+        for level, text, _ in self.entries:
+            if level == 1:
+                return text
+        raise Exception("no h1 header for title")
 
+    def toc_node(self):
+        """ Return nested ul ParentNode linking to every heading, or "" if there are none. """
+        root = []
+        # open list items as (level, children) from the outermost in
+        stack = []
+        for level, text, slug in self.entries:
+            while stack and stack[-1][0] >= level:
+                stack.pop()
+            children = [LeafNode("a", escape_text(text), {"href": f"#{slug}"})]
+            (stack[-1][1] if stack else root).append(children)
+            stack.append((level, children))
+        if not root:
+            return ""
+        return toc_list(root)
 
-def markdown_to_html_node(markdown: str) -> HTMLNode:
-    blocks = []
-    for block in markdown_to_blocks(markdown):
+
+def toc_list(items) -> HTMLNode:
+    """ Return ul of li nodes for items made by HeadingIndex.toc_node. """
+    list_items = []
+    for link, *nested in items:
+        children = [link]
+        if nested:
+            children.append(toc_list(nested))
+        list_items.append(ParentNode("li", children))
+    return ParentNode("ul", list_items)
+
+
+def slugify(text) -> str:
+    """ Return lowercase text with words joined by "-" and punctuation removed. """
+    words = "".join(char if char.isalnum() or char in "-_" else " "
+                    for char in text.lower()).split()
+    return "-".join(words)
+
+
+def markdown_to_html_node(markdown: str, basepath="/", cache=block_cache,
+                          headings: HeadingIndex=None) -> HTMLNode:
+    """ Return div ParentNode with a child node for each markdown block.
+     Root-relative link and image urls are prefixed with basepath.
+     Blocks found in the BlockCache aren't converted again, pass cache=None to skip it.
+     With a HeadingIndex, the document's headings are collected in it.
+     """
+    return ParentNode("div", list(iter_block_nodes(markdown.split("\n"), basepath, cache,
+                                                   headings)))
+
+
+def iter_block_nodes(lines, basepath="/", cache=block_cache, headings: HeadingIndex=None):
+    """ Yield HTMLNode of each block as soon as it has been read from lines
+     and converted, so only one block is held in memory at a time.
+     """
+    for count, (block, block_type) in enumerate(scan_blocks(lines), 1):
+        if cache is None:
+            node = block_to_html_node(block, basepath, block_type)
+        else:
+            cache.reserve(count)
+            key = (block, basepath)
+            node = cache.get(key)
+            if node is None:
+                node = block_to_html_node(block, basepath, block_type)
+                cache.put(key, node)
+        if headings is not None and block_type == BlockType.H:
+            node = headings.add_node(node)
+        yield node
+
+
+def collect_headings(lines, basepath="/", anchors=False) -> HeadingIndex:
+    """ Return HeadingIndex of a document, converting only its heading blocks. """
+    headings = HeadingIndex(anchors)
+    for block, block_type in scan_blocks(lines):
+        if block_type == BlockType.H:
+            headings.add_node(block_to_html_node(block, basepath, block_type))
+    return headings
+
+
+def block_to_html_node(block: str, basepath="/", block_type: BlockType=None) -> HTMLNode:
+    """ Return HTMLNode subtree for a single markdown block. """
+    if block_type is None:
         block_type = block_to_block_type(block)
-        match block_type:
-            case BlockType.P:
-                # remove newlines from paragraph text for now, should it be <br>?
-                block = block.replace("\n", " ")
-                blocks.append(ParentNode("p", text_to_children(block)))
-            case BlockType.H:
-                blocks.append(ParentNode(get_heading_tag(block),
-                                         text_to_children(block.lstrip("# "))))
-            case BlockType.CODE:
-                blocks.append(ParentNode("pre", [LeafNode("code", block.strip("`\n"))]))
-            case BlockType.QUOTE:
-                new_block = ""
-                for line in block.split("\n"):
-                    new_block += line.lstrip("> ") + "\n"
-                blocks.append(ParentNode("blockquote", text_to_children(new_block)))
-            case BlockType.UL:
-                list_items = []
-                for line in block.split("\n"):
-                    line = line.lstrip("- ")
-                    list_items.append(ParentNode("li", text_to_children(line)))
-                blocks.append(ParentNode("ul", list_items))
-            case BlockType.OL:
-                list_items = []
-                i = 1
-                for line in block.split("\n"):
-                    line = line.lstrip(f"{i}. ")
-                    i += 1
-                    list_items.append(ParentNode("li", text_to_children(line)))
-                blocks.append(ParentNode("ol", list_items))
-            case _:
-                raise Exception("undefined block type")
-
-    return ParentNode("div", blocks)
-
-
-def text_to_children(text):
+    match block_type:
+        case BlockType.P:
+            # remove newlines from paragraph text for now, should it be <br>?
+            block = block.replace("\n", " ")
+            return ParentNode("p", text_to_children(block, basepath))
+        case BlockType.H:
+            level = heading_level(block)
+            if not level:
+                raise Exception("Heading improperly formatted.")
+            return ParentNode(HEADING_TAGS[level - 1],
+                              text_to_children(block[level + 1:].lstrip(" "), basepath))
+        case BlockType.CODE:
+            return ParentNode("pre", [LeafNode("code", escape_text(block.strip("`\n")))])
+        case BlockType.QUOTE:
+            # only the marker is removed, "> > x" keeps its inner ">"
+            new_block = "".join(line[1:].lstrip(" ") + "\n" for line in block.split("\n"))
+            return ParentNode("blockquote", text_to_children(new_block, basepath))
+        case BlockType.UL:
+            list_items = []
+            for line in block.split("\n"):
+                list_items.append(ParentNode("li", text_to_children(line[2:], basepath)))
+            return ParentNode("ul", list_items)
+        case BlockType.OL:
+            lines = block.split("\n")
+            list_items = []
+            for line, prefix in zip(lines, ordered_list_prefixes(len(lines))):
+                list_items.append(ParentNode("li", text_to_children(line[len(prefix):],
+                                                                    basepath)))
+            return ParentNode("ol", list_items)
+        case _:
+            raise Exception("undefined block type")
+
+
+def text_to_children(text, basepath="/"):
     textnodes = text_to_textnodes(text)
     children = []
     for node in textnodes:
-        children.append(text_node_to_html_node(node))
+        children.append(text_node_to_html_node(node, basepath))
     return children
 
+HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+
+
 def get_heading_tag(text):
-    for i in range(6):
-        if text.startswith(f"{'#' * (i+1)} "):
-            return f"h{i+1}"
-    raise Exception("Heading improperly formatted.")
\ No newline at end of file
+    level = heading_level(text)
+    if not level:
+        raise Exception("Heading improperly formatted.")
+    return HEADING_TAGS[level - 1]
\ No newline at end of file
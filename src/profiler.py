@@ -0,0 +1,158 @@
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+import block_markdown
+import markdown_html
+
+# phases in the order they happen to a page, for the report
+PHASES = ("static copy", "markdown read", "markdown_to_blocks", "block_to_block_type",
+          "text_to_textnodes", "to_html", "template render", "file write")
+
+
+class BuildProfile():
+    """ Time spent in each build phase and on each page.
+     Phase times are exclusive, time spent in a nested phase is only counted
+     for the nested phase, so the phases add up to the instrumented time.
+     """
+    def __init__(self):
+        self.phases = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.pages = []
+        self.stack = []
+
+    def start(self, name):
+        self.stack.append([name, time.perf_counter(), 0.0])
+
+    def stop(self):
+        name, start, nested = self.stack.pop()
+        elapsed = time.perf_counter() - start
+        self.phases[name] += elapsed - nested
+        self.calls[name] += 1
+        if self.stack:
+            self.stack[-1][2] += elapsed
+
+    @contextmanager
+    def phase(self, name):
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    def wrap(self, func, name):
+        """ Return func with every call timed as phase name. """
+        def timed(*args, **kwargs):
+            self.start(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.stop()
+        return timed
+
+    def wrap_iter(self, func, name):
+        """ Return generator function func with the work of every step timed as phase name. """
+        def timed(*args, **kwargs):
+            iterator = func(*args, **kwargs)
+            while True:
+                self.start(name)
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    self.stop()
+                yield item
+        return timed
+
+    def add_page(self, path, seconds, size):
+        self.pages.append((path, seconds, size))
+
+    def merge(self, phases: dict, calls: dict=None):
+        """ Add phase totals measured elsewhere, e.g. in a pool worker. """
+        for name, seconds in phases.items():
+            self.phases[name] += seconds
+        for name, count in (calls or {}).items():
+            self.calls[name] += count
+
+    def to_dict(self, elapsed, slowest=10) -> dict:
+        """ Return the profile as a JSON serializable dict. """
+        page_bytes = sum(size for _, _, size in self.pages)
+        names = [name for name in PHASES if name in self.phases]
+        names += sorted(name for name in self.phases if name not in PHASES)
+        return {
+            "elapsed": elapsed,
+            "pages": len(self.pages),
+            "bytes": page_bytes,
+            "pages_per_second": len(self.pages) / elapsed if elapsed else 0.0,
+            "mb_per_second": page_bytes / elapsed / 1e6 if elapsed else 0.0,
+            "phases": {name: {"seconds": self.phases[name], "calls": self.calls[name]}
+                       for name in names},
+            "slowest": [{"path": path, "seconds": seconds, "bytes": size}
+                        for path, seconds, size in
+                        sorted(self.pages, key=lambda page: page[1], reverse=True)[:slowest]],
+        }
+
+    def report(self, elapsed, slowest=10) -> str:
+        """ Return human readable report of the profile. """
+        data = self.to_dict(elapsed, slowest)
+        total = sum(phase["seconds"] for phase in data["phases"].values()) or 1.0
+        lines = [f"Build profile: {data['pages']} pages in {elapsed:.3f} s, "
+                 f"{data['pages_per_second']:.1f} pages/s, {data['mb_per_second']:.2f} MB/s"]
+        for name, phase in data["phases"].items():
+            lines.append(f"  {name:<22}{phase['seconds'] * 1000:>10.1f} ms"
+                         f"{phase['seconds'] / total:>7.1%}{phase['calls']:>10} calls")
+        if data["slowest"]:
+            lines.append("Slowest pages:")
+            for page in data["slowest"]:
+                lines.append(f"  {page['seconds'] * 1000:8.1f} ms  {page['path']}")
+        return "\n".join(lines)
+
+    def write_json(self, path, elapsed, slowest=10):
+        with open(path, "w") as file:
+            json.dump(self.to_dict(elapsed, slowest), file, indent=1)
+
+
+# profile of the running build, None when not profiling
+active = None
+_originals = {}
+_no_phase = nullcontext()
+
+
+def phase(name):
+    """ Return context manager timing name in the active profile, or doing nothing. """
+    if active is None:
+        return _no_phase
+    return active.phase(name)
+
+
+def install(profile: BuildProfile):
+    """ Make profile active and hook it into the parser's hot functions. """
+    global active
+    uninstall()
+    active = profile
+    hooks = [
+        (markdown_html, "scan_blocks", profile.wrap_iter, "markdown_to_blocks"),
+        (block_markdown, "lines_to_block_type", profile.wrap, "block_to_block_type"),
+        (markdown_html, "text_to_textnodes", profile.wrap, "text_to_textnodes"),
+    ]
+    for module, attr, wrap, name in hooks:
+        _originals[(module, attr)] = getattr(module, attr)
+        setattr(module, attr, wrap(getattr(module, attr), name))
+
+
+def uninstall():
+    """ Remove the hooks of the active profile. """
+    global active
+    for (module, attr), func in _originals.items():
+        setattr(module, attr, func)
+    _originals.clear()
+    active = None
+
+
+class TimedNode():
+    """ Stand-in for an HTMLNode that times its serialization as the to_html phase. """
+    def __init__(self, node, profile: BuildProfile):
+        self.node = node
+        self.iter_html = profile.wrap_iter(node.iter_html, "to_html")
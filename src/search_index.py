@@ -0,0 +1,229 @@
+import hashlib
+import heapq
+import json
+import os
+import re
+import shutil
+from operator import itemgetter
+
+from htmlnode import HTMLNode, unescape_text
+from staging import remove_file
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def count_terms(node: HTMLNode, counts: dict=None) -> dict:
+    """ Return dict of term frequencies in the text of the node tree, image alt texts included. """
+    if counts is None:
+        counts = {}
+    if node.children is not None:
+        for child in node.children:
+            count_terms(child, counts)
+        return counts
+    if node.tag == "img" and node.props:
+        text = node.props.get("alt", "")
+    else:
+        text = unescape_text(node.value)
+    for term in WORD_PATTERN.findall(text.lower()):
+        counts[term] = counts.get(term, 0) + 1
+    return counts
+
+
+def iter_counting_terms(nodes, counts: dict):
+    """ Yield nodes, adding the terms of each to counts as it passes. """
+    for node in nodes:
+        count_terms(node, counts)
+        yield node
+
+
+def shard_name(term) -> str:
+    """ Return name of the shard holding term: hex of its first two characters in utf-8. """
+    return term[:2].encode().hex()
+
+
+def page_url(key, basepath="/") -> str:
+    """ Return url of the page in output path key. """
+    url = key.replace(os.sep, "/")
+    if url == "index.html" or url.endswith("/index.html"):
+        url = url[:-len("index.html")]
+    return basepath + url
+
+
+class SearchIndexBuilder():
+    """ Inverted index of the words on every page, written as static files
+     under search/ in the public directory:
+       search/index.json     {"version", "documents": [[url, title], ...], "shards": [...]}
+       search/<shard>.json   {term: [[document number, term frequency], ...]}
+     where a term is in shard shard_name(term), so a front end fetches only
+     the shards of the words it looks up.
+     Term counts of each page are cached under cache_dir by page and inputs,
+     and the index is only rewritten when the set of entries changed. While
+     writing, postings are spilled to sorted runs on disk every max_postings
+     and merged, so memory doesn't grow with the site.
+     """
+    version = 1
+    dir_name = "search"
+
+    def __init__(self, cache_dir, root, basepath="/", max_postings=1_000_000):
+        self.cache_dir = cache_dir
+        self.root = root
+        self.basepath = basepath
+        self.max_postings = max_postings
+        self.pages = []
+
+    def key(self, dest_path):
+        return os.path.relpath(dest_path, self.root)
+
+    def entry_path(self, dest_path, inputs: dict):
+        digest = hashlib.sha256(json.dumps([self.key(dest_path), inputs],
+                                           sort_keys=True).encode()).hexdigest()
+        return os.path.join(self.cache_dir, "pages", digest[:2], digest + ".json")
+
+    def add(self, dest_path, inputs: dict) -> bool:
+        """ Include the cached terms of dest_path built from inputs.
+         Return False if there are none.
+         """
+        path = self.entry_path(dest_path, inputs)
+        if not os.path.isfile(path):
+            return False
+        self.pages.append((self.key(dest_path), path))
+        return True
+
+    def add_page(self, dest_path, inputs: dict, title, terms: dict):
+        """ Cache the terms of a generated page and include them. """
+        path = self.entry_path(dest_path, inputs)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump({"title": title, "terms": terms}, file, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        self.pages.append((self.key(dest_path), path))
+
+    def add_copy(self, dest_path, inputs: dict, entry_path):
+        """ Include the terms another builder, like a shard's, cached in
+         entry_path for dest_path, copying them into this builder's cache.
+         """
+        path = self.entry_path(dest_path, inputs)
+        if not os.path.isfile(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            shutil.copyfile(entry_path, tmp_path)
+            os.replace(tmp_path, path)
+        self.pages.append((self.key(dest_path), path))
+
+    def digest(self) -> str:
+        """ Return hash identifying the entries and settings of this index. """
+        digest = hashlib.sha256(f"{self.version}\0{self.basepath}".encode())
+        for key, path in sorted(self.pages):
+            digest.update(f"\0{key}\0{os.path.basename(path)}".encode())
+        return digest.hexdigest()
+
+    def write(self, manifest) -> bool:
+        """ Write the index into root, recording its files in manifest.
+         Only the index's own files are written, other outputs in the same
+         directory, like a search page, are left alone. Files of the previous
+         index, told apart by their inputs, that aren't written again are
+         left for manifest.remove_stale_outputs.
+         Raise Exception if a file of the index is another output of the build.
+         Return False if the previous index was still up to date.
+         """
+        inputs = {"search": self.digest()}
+        previous = [key for key, old in manifest.old.items() if "search" in old]
+        if previous and all(manifest.old[key] == inputs and
+                            os.path.isfile(os.path.join(self.root, key)) for key in previous):
+            for key in previous:
+                self.check_collision(manifest, os.path.join(self.root, key))
+                manifest.record(os.path.join(self.root, key), inputs)
+            return False
+
+        os.makedirs(os.path.join(self.root, self.dir_name), exist_ok=True)
+        documents, terms = self.collect()
+        shards = []
+        for name, postings in self.iter_shards(terms):
+            self.write_file(manifest, name + ".json", postings, inputs)
+            shards.append(name)
+        self.write_file(manifest, "index.json",
+                        {"version": self.version, "documents": documents, "shards": shards},
+                        inputs)
+        return True
+
+    def check_collision(self, manifest, path):
+        other = manifest.new.get(manifest.key(path))
+        if other is not None and "search" not in other:
+            raise Exception(f"search index file {path} collides with another output "
+                            f"of the build")
+
+    def write_file(self, manifest, name, data, inputs: dict):
+        path = os.path.join(self.root, self.dir_name, name)
+        self.check_collision(manifest, path)
+        # the previous file may be a hardlink into the live site
+        remove_file(path)
+        with open(path, "w") as file:
+            json.dump(data, file, separators=(",", ":"))
+        manifest.record(path, inputs)
+
+    def collect(self):
+        """ Return (documents, terms) where terms iterates (term, postings) sorted by term. """
+        runs_dir = os.path.join(self.cache_dir, "runs")
+        shutil.rmtree(runs_dir, ignore_errors=True)
+        documents = []
+        runs = []
+        postings = {}
+        count = 0
+        for number, (key, path) in enumerate(sorted(self.pages)):
+            with open(path) as file:
+                entry = json.load(file)
+            documents.append([page_url(key, self.basepath), entry["title"]])
+            for term, frequency in entry["terms"].items():
+                postings.setdefault(term, []).append([number, frequency])
+            count += len(entry["terms"])
+            if count >= self.max_postings:
+                runs.append(spill_run(postings, runs_dir, len(runs)))
+                postings = {}
+                count = 0
+        merged = heapq.merge(*[read_run(path) for path in runs], sorted(postings.items()),
+                             key=itemgetter(0))
+        return documents, merged
+
+    def iter_shards(self, terms):
+        """ Yield (shard name, {term: postings}) from terms sorted by term.
+         Postings of a term split across runs are joined in document order.
+         """
+        name = None
+        shard = {}
+        for term, postings in terms:
+            if shard_name(term) != name:
+                if shard:
+                    yield name, shard
+                name = shard_name(term)
+                shard = {}
+            shard.setdefault(term, []).extend(postings)
+        if shard:
+            yield name, shard
+
+    def prune(self):
+        """ Remove cached page entries not used by this build. """
+        used = {path for _, path in self.pages}
+        pages_dir = os.path.join(self.cache_dir, "pages")
+        for dir_path, _, file_names in os.walk(pages_dir):
+            for name in file_names:
+                path = os.path.join(dir_path, name)
+                if path not in used:
+                    os.remove(path)
+        shutil.rmtree(os.path.join(self.cache_dir, "runs"), ignore_errors=True)
+
+
+def spill_run(postings: dict, runs_dir, number):
+    """ Write postings sorted by term to a run file, one JSON line per term. Return its path. """
+    os.makedirs(runs_dir, exist_ok=True)
+    path = os.path.join(runs_dir, f"{number}.jsonl")
+    with open(path, "w") as file:
+        for term in sorted(postings):
+            file.write(json.dumps([term, postings[term]], separators=(",", ":")) + "\n")
+    return path
+
+
+def read_run(path):
+    with open(path) as file:
+        for line in file:
+            yield json.loads(line)
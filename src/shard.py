@@ -0,0 +1,59 @@
+import hashlib
+import os
+
+
+def stable_hash(path, root, salt="") -> str:
+    """ Return hash of salt and path relative to root, the same on every
+     machine and platform.
+     """
+    rel_path = os.path.relpath(path, root).replace(os.sep, "/")
+    return hashlib.sha256(f"{salt}\0{rel_path}".encode()).hexdigest()
+
+
+def shard_index(path, count, root) -> int:
+    """ Return index of the shard, of count, that builds the page in path:
+     the one scoring the highest stable_hash of the page with the shard
+     number (rendezvous hashing). It depends on nothing but the path, so
+     adding, removing or editing other pages never moves a page, and going
+     from N to N + 1 shards only moves the pages the new shard wins.
+     """
+    return max(range(count), key=lambda number: stable_hash(path, root, number))
+
+
+def partition(pages, count, root) -> list:
+    """ Split pages, a list of (markdown path, html path), into count lists
+     by shard_index of the markdown path. Every machine sharing the content
+     gets the same split, and pages spread evenly over the shards on average.
+     """
+    shards = [[] for _ in range(count)]
+    for item in sorted(pages):
+        shards[shard_index(item[0], count, root)].append(item)
+    return shards
+
+
+class Shard():
+    """ Part number of count of a sharded build, numbered from 1.
+     Each shard builds its share of the pages into its own directory,
+     and the first also copies the static files.
+     """
+    def __init__(self, number, count):
+        if count < 1 or not 1 <= number <= count:
+            raise ValueError(f"shard must be K/N with 1 <= K <= N, not {number}/{count}")
+        self.number = number
+        self.count = count
+
+    @classmethod
+    def parse(cls, text):
+        """ Return Shard from text like "2/4". """
+        number, sep, count = text.partition("/")
+        if not sep or not number.isdigit() or not count.isdigit():
+            raise ValueError(f"shard must be K/N, like 2/4, not {text!r}")
+        return cls(int(number), int(count))
+
+    @property
+    def name(self) -> str:
+        return f"{self.number}-of-{self.count}"
+
+    def select(self, pages, root) -> list:
+        """ Return this shard's part of pages, whose markdown is under root. """
+        return partition(pages, self.count, root)[self.number - 1]
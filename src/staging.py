@@ -0,0 +1,136 @@
+import ctypes
+import os
+import shutil
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+def staging_path(dir_path) -> str:
+    return dir_path.rstrip(os.sep) + ".staging"
+
+
+def clone_tree(from_dir_path, dest_dir_path):
+    """ Recreate from_dir_path in dest_dir_path with hardlinks to its files,
+     copying where linking isn't possible. Outputs in the clone must be
+     unlinked before they are rewritten, see remove_file.
+     """
+    for dir_path, dir_names, file_names in os.walk(from_dir_path):
+        dest = os.path.join(dest_dir_path, os.path.relpath(dir_path, from_dir_path))
+        os.makedirs(dest, exist_ok=True)
+        for name in file_names:
+            src = os.path.join(dir_path, name)
+            try:
+                os.link(src, os.path.join(dest, name))
+            except OSError:
+                shutil.copy2(src, os.path.join(dest, name))
+
+
+def remove_file(path):
+    """ Remove path if it exists, so a new file can be written without
+     changing other hardlinks to the old one.
+     """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def exchange_dirs(path_a, path_b) -> bool:
+    """ Atomically swap two directories with renameat2(RENAME_EXCHANGE).
+     Return False if the platform doesn't support it.
+     """
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+    except (OSError, AttributeError):
+        return False
+    AT_FDCWD = -100
+    RENAME_EXCHANGE = 2
+    if renameat2(AT_FDCWD, os.fsencode(path_a), AT_FDCWD, os.fsencode(path_b),
+                 RENAME_EXCHANGE) != 0:
+        errno = ctypes.get_errno()
+        if errno in (22, 38, 95):
+            # EINVAL, ENOSYS, EOPNOTSUPP: kernel or filesystem can't exchange
+            return False
+        raise OSError(errno, os.strerror(errno), path_a)
+    return True
+
+
+def swap_into_place(staging_dir_path, dir_path):
+    """ Replace dir_path with staging_dir_path and delete the old contents.
+     Where renames can't exchange directories, dir_path is briefly missing
+     between two renames.
+     """
+    if not os.path.exists(dir_path):
+        os.rename(staging_dir_path, dir_path)
+        return
+    if not exchange_dirs(staging_dir_path, dir_path):
+        old_dir_path = dir_path.rstrip(os.sep) + ".old"
+        if os.path.exists(old_dir_path):
+            shutil.rmtree(old_dir_path)
+        os.rename(dir_path, old_dir_path)
+        os.rename(staging_dir_path, dir_path)
+        staging_dir_path = old_dir_path
+    shutil.rmtree(staging_dir_path)
+
+
+class OutputWriter():
+    """ Pool of threads writing pages to disk, so file I/O overlaps with
+     converting the next page. Pages given as fragments are rendered by the
+     threads straight into their files, never held as one string. At most
+     max_pending pages, 2 * jobs by default, wait for a write, write()
+     blocks until one finishes. Call close() to wait for the writes.
+     """
+    def __init__(self, jobs=4, max_pending=None):
+        self.pool = ThreadPoolExecutor(max_workers=jobs)
+        self.slots = threading.BoundedSemaphore(max_pending or 2 * jobs)
+        self.lock = threading.Lock()
+        self.error = None
+
+    def write(self, dest_path, content):
+        """ Write content, a string or an iterable of string fragments, to
+         dest_path in a thread. An iterable is consumed in that thread, so
+         what it renders from must not change until the write is done.
+         """
+        self.slots.acquire()
+        try:
+            future = self.pool.submit(write_file, dest_path, content)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(self.done)
+
+    def done(self, future):
+        error = future.exception()
+        if error is not None:
+            with self.lock:
+                if self.error is None:
+                    self.error = error
+        self.slots.release()
+
+    def close(self):
+        """ Wait for all writes, raise the first error that happened. """
+        self.pool.shutdown()
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_file(dest_path, content):
+    """ Write content, a string or an iterable of string fragments, to
+     dest_path, unlinking the old file first.
+     """
+    remove_file(dest_path)
+    with open(dest_path, "w", buffering=1 << 16) as file:
+        if isinstance(content, str):
+            file.write(content)
+        else:
+            file.writelines(content)
@@ -0,0 +1,114 @@
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from manifest import hash_file
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# linux ioctl cloning a whole file on copy-on-write filesystems (btrfs, xfs)
+FICLONE = 0x40049409
+
+# ways to put a static file in place, in the order "auto" tries them
+SYNC_MODES = ("auto", "reflink", "hardlink", "copy")
+
+
+def reflink(src, dst):
+    """ Make dst a copy-on-write clone of src, raise OSError if not supported. """
+    if fcntl is None:
+        raise OSError("reflinks aren't supported on this platform")
+    with open(src, "rb") as source, open(dst, "wb") as dest:
+        try:
+            fcntl.ioctl(dest.fileno(), FICLONE, source.fileno())
+        except OSError:
+            dest.close()
+            os.remove(dst)
+            raise
+    shutil.copystat(src, dst)
+
+
+def link_or_copy(src, dst, mode="auto") -> str:
+    """ Put a copy of src in dst without copying bytes where the filesystem allows it.
+     Mode "auto" tries a reflink, then a hardlink, then copies. "reflink" and
+     "hardlink" fall back to copying. Return the method that was used.
+     """
+    # never write through an old hardlink into the source file
+    if os.path.lexists(dst):
+        os.remove(dst)
+    if mode in ("auto", "reflink"):
+        try:
+            reflink(src, dst)
+            return "reflink"
+        except OSError:
+            pass
+    if mode in ("auto", "hardlink"):
+        try:
+            os.link(src, dst)
+            return "hardlink"
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+    return "copy"
+
+
+def collect_static_files(from_dir_path, dest_dir_path):
+    """ Walk from_dir_path once and return list of (source, destination) pairs.
+     Missing destination directories are created along the way.
+     """
+    files = []
+    for item in os.listdir(from_dir_path):
+        src = os.path.join(from_dir_path, item)
+        dst = os.path.join(dest_dir_path, item)
+        if os.path.isfile(src):
+            files.append((src, dst))
+        else:
+            os.makedirs(dst, exist_ok=True)
+            files.extend(collect_static_files(src, dst))
+    return files
+
+
+def sync_file(src, dst, previous: dict=None, mode="auto"):
+    """ Bring dst up to date with src.
+     previous is the manifest entry dst was last built from. When size and
+     mtime of src still match it the file isn't even read, when only the
+     mtime changed the content hash decides. A file synced with another
+     mode is always put in place again, so switching to "copy" replaces
+     earlier links.
+     Return (inputs, method) where method is None if nothing was copied.
+     """
+    stat = os.stat(src)
+    current = bool(previous) and previous.get("mode") == mode and os.path.isfile(dst)
+    if (current and previous.get("size") == stat.st_size and
+            previous.get("mtime") == stat.st_mtime_ns):
+        return previous, None
+    inputs = {"source": hash_file(src), "size": stat.st_size, "mtime": stat.st_mtime_ns,
+              "mode": mode}
+    if current and previous.get("source") == inputs["source"]:
+        return inputs, None
+    return inputs, link_or_copy(src, dst, mode)
+
+
+def sync_static_files(from_dir_path, dest_dir_path, manifest=None, mode="auto", jobs=None):
+    """ Sync everything in from_dir_path to dest_dir_path on a pool of jobs threads.
+     With a manifest, unchanged files are skipped and the rest recorded in it.
+     Return dict counting files per method, "unchanged" for skipped ones.
+     """
+    files = collect_static_files(from_dir_path, dest_dir_path)
+    counts = {}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = []
+        for src, dst in files:
+            previous = manifest.old.get(manifest.key(dst)) if manifest is not None else None
+            futures.append((src, dst, pool.submit(sync_file, src, dst, previous, mode)))
+        for src, dst, future in futures:
+            inputs, method = future.result()
+            if method is not None:
+                print(f"Copying file: {src} -> {dst} ({method})")
+            method = method or "unchanged"
+            counts[method] = counts.get(method, 0) + 1
+            if manifest is not None:
+                manifest.record(dst, inputs)
+    return counts
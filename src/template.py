@@ -0,0 +1,64 @@
+import os
+import re
+
+SLOT_PATTERN = re.compile(r"\{\{ *(\w+) *\}\}")
+
+
+def rebase_urls(html, basepath):
+    """ Return html with root-relative href and src URLs prefixed with basepath. """
+    html = html.replace('href="/', f'href="{basepath}')
+    return html.replace('src="/', f'src="{basepath}')
+
+
+class Template():
+    """ Template compiled into a sequence of literal chunks and named slots.
+     Basepath is applied to the literal chunks once, at compile time.
+     """
+    def __init__(self, text, basepath="/"):
+        self.parts = []
+        self.slots = set()
+        pos = 0
+        for match in SLOT_PATTERN.finditer(text):
+            self.parts.append(rebase_urls(text[pos:match.start()], basepath))
+            # keep the original text so unknown slots render untouched
+            self.parts.append((match.group(1), match.group(0)))
+            self.slots.add(match.group(1))
+            pos = match.end()
+        self.parts.append(rebase_urls(text[pos:], basepath))
+
+    def iter_render(self, values: dict):
+        """ Yield the rendered page in fragments. HTMLNode values are streamed. """
+        for part in self.parts:
+            if isinstance(part, str):
+                yield part
+                continue
+            name, raw = part
+            value = values.get(name, raw)
+            if hasattr(value, "iter_html"):
+                yield from value.iter_html()
+            else:
+                yield value
+
+    def render(self, values: dict) -> str:
+        return "".join(self.iter_render(values))
+
+    def write(self, file, values: dict):
+        file.writelines(self.iter_render(values))
+
+
+_templates = {}
+
+
+def load_template(template_path, basepath="/") -> Template:
+    """ Return compiled template from template_path.
+     Templates are compiled once per process and recompiled only when the file changes.
+     """
+    stat = os.stat(template_path)
+    key = (template_path, basepath)
+    cached = _templates.get(key)
+    if cached is not None and cached[0] == (stat.st_mtime_ns, stat.st_size):
+        return cached[1]
+    with open(template_path) as file:
+        template = Template(file.read(), basepath)
+    _templates[key] = ((stat.st_mtime_ns, stat.st_size), template)
+    return template
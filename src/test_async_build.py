@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+
+from async_build import PipelineOptions, run_pipeline
+
+
+def render(from_path, markdown):
+    if markdown == "fail":
+        raise ValueError(f"can't render {from_path}")
+    return markdown.upper(), {"title": os.path.basename(from_path)}
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def pages(self, texts):
+        pages = []
+        for i, text in enumerate(texts):
+            from_path = os.path.join(self.tmp.name, f"{i}.md")
+            with open(from_path, "w") as file:
+                file.write(text)
+            pages.append((from_path, os.path.join(self.tmp.name, f"{i}.html")))
+        return pages
+
+    def read(self, path):
+        with open(path) as file:
+            return file.read()
+
+    def test_stage_counts_at_least_one(self):
+        for name in ("readers", "renderers", "writers", "queue_size"):
+            with self.assertRaises(ValueError):
+                PipelineOptions(**{name: 0})
+
+    def test_all_pages_pass_through_small_queues(self):
+        pages = self.pages([f"page {i}" for i in range(20)])
+        options = PipelineOptions(readers=3, renderers=1, writers=2, queue_size=1)
+        results = run_pipeline(pages, render, options)
+        self.assertEqual(sorted(result[0] for result in results),
+                         sorted(from_path for from_path, _ in pages))
+        for i, (from_path, dest_path) in enumerate(pages):
+            self.assertEqual(self.read(dest_path), f"PAGE {i}")
+        for from_path, _, seconds, error, _, page in results:
+            self.assertIsNone(error)
+            self.assertGreaterEqual(seconds, 0)
+            self.assertEqual(page, {"title": os.path.basename(from_path)})
+
+    def test_render_processes(self):
+        pages = self.pages(["a", "b", "c"])
+        results = run_pipeline(pages, render, PipelineOptions(renderers=2))
+        self.assertEqual(len(results), 3)
+        self.assertEqual([self.read(dest_path) for _, dest_path in pages], ["A", "B", "C"])
+
+    def test_errors_are_per_page(self):
+        pages = self.pages(["ok", "fail"])
+        pages.append((os.path.join(self.tmp.name, "missing.md"),
+                      os.path.join(self.tmp.name, "missing.html")))
+        results = {result[0]: result for result in run_pipeline(pages, render)}
+        self.assertIsNone(results[pages[0][0]][3])
+        self.assertEqual(self.read(pages[0][1]), "OK")
+        self.assertTrue(results[pages[1][0]][3].startswith("ValueError"))
+        self.assertTrue(results[pages[2][0]][3].startswith("FileNotFoundError"))
+        self.assertFalse(os.path.exists(pages[1][1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
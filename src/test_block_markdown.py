@@ -1,6 +1,6 @@
 import unittest
 
-from block_markdown import BlockType, markdown_to_blocks, block_to_block_type
+from block_markdown import BlockType, markdown_to_blocks, block_to_block_type, scan_blocks
 
 class TestMarkdownBlocks(unittest.TestCase):
     def test_markdown_to_blocks(self):
@@ -31,6 +31,40 @@ Next comes multiple empty lines
             ],
         )
 
+    def test_markdown_to_blocks_fenced_code_blank_lines(self):
+        md = """
+paragraph
+
+```
+def func():
+
+    return 1
+```
+
+- list
+"""
+        self.assertEqual(
+            markdown_to_blocks(md),
+            ["paragraph", "```\ndef func():\n\n    return 1\n```", "- list"],
+        )
+
+    def test_markdown_to_blocks_unclosed_fence(self):
+        md = "```\nnever closed\n\nnext paragraph"
+        self.assertEqual(markdown_to_blocks(md), ["```\nnever closed", "next paragraph"])
+
+    def test_markdown_to_blocks_whitespace_line(self):
+        md = "first\n   \nsecond"
+        self.assertEqual(markdown_to_blocks(md), ["first", "second"])
+
+    def test_scan_blocks(self):
+        lines = ["# title\n", "\n", "> quote\n", "> more\n", "\n", "1. one\n", "2. two\n"]
+        self.assertEqual(
+            list(scan_blocks(lines)),
+            [("# title", BlockType.H),
+             ("> quote\n> more", BlockType.QUOTE),
+             ("1. one\n2. two", BlockType.OL)],
+        )
+
     def test_block_to_blocktype_h1(self):
         md_block = """# this is h1 heading"""
         block_type = block_to_block_type(md_block)
@@ -0,0 +1,67 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from compress import ENCODINGS, brotli, compress_outputs
+from manifest import BuildManifest
+
+
+class TestCompress(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "docs")
+        self.manifest_path = os.path.join(self.tmp.name, "manifest.json")
+        self.write("index.html", "<p>home</p>" * 100)
+        self.write("index.css", "p { color: red; }")
+        self.write("images/tom.png", "not text")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, key, text):
+        path = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(text)
+
+    def build(self, old=None):
+        manifest = BuildManifest(self.manifest_path, self.root, old)
+        for key in ["index.html", "index.css", os.path.join("images", "tom.png")]:
+            manifest.record(os.path.join(self.root, key), {"source": key})
+        return manifest, compress_outputs(manifest)
+
+    def test_variants_of_html_and_css(self):
+        manifest, counts = self.build()
+        self.assertEqual(counts, (2 * len(ENCODINGS), 0))
+        with gzip.open(os.path.join(self.root, "index.html.gz"), "rt") as file:
+            self.assertEqual(file.read(), "<p>home</p>" * 100)
+        self.assertIn("index.css.gz", manifest.new)
+        self.assertFalse(os.path.exists(os.path.join(self.root, "images", "tom.png.gz")))
+
+    def test_unchanged_outputs_are_skipped(self):
+        manifest, _ = self.build()
+        self.write("index.css", "p { color: blue; }")
+        manifest, counts = self.build(manifest.new)
+        self.assertEqual(counts, (len(ENCODINGS), len(ENCODINGS)))
+        with gzip.open(os.path.join(self.root, "index.css.gz"), "rt") as file:
+            self.assertEqual(file.read(), "p { color: blue; }")
+
+    def test_gzip_is_reproducible(self):
+        self.build()
+        with open(os.path.join(self.root, "index.html.gz"), "rb") as file:
+            first = file.read()
+        os.remove(os.path.join(self.root, "index.html.gz"))
+        self.build()
+        with open(os.path.join(self.root, "index.html.gz"), "rb") as file:
+            self.assertEqual(file.read(), first)
+
+    @unittest.skipIf(brotli is None, "brotli isn't installed")
+    def test_brotli(self):
+        self.build()
+        with open(os.path.join(self.root, "index.html.br"), "rb") as file:
+            self.assertEqual(brotli.decompress(file.read()).decode(), "<p>home</p>" * 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+import urllib.request
+
+from dev_server import snapshot, diff_snapshots, watch, start_server
+
+
+class TestDevServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(text)
+        return path
+
+    def test_snapshot(self):
+        page = self.write(os.path.join("content", "index.md"), "# hi")
+        template = self.write("template.html", "{{ Content }}")
+        files = snapshot([os.path.join(self.root, "content"), template])
+        self.assertEqual(set(files), {page, template})
+
+    def test_diff_snapshots(self):
+        old = {"a.md": (1, 10), "b.md": (1, 10), "c.md": (1, 10)}
+        new = {"a.md": (1, 10), "b.md": (2, 12), "d.md": (1, 3)}
+        self.assertEqual(diff_snapshots(old, new), ({"b.md", "d.md"}, {"c.md"}))
+
+    def test_watch(self):
+        content = os.path.join(self.root, "content")
+        self.write(os.path.join("content", "index.md"), "# hi")
+        stop = threading.Event()
+        changes = []
+
+        def on_change(changed, removed):
+            changes.append((changed, removed))
+            stop.set()
+
+        thread = threading.Thread(target=watch, args=([content], on_change, 0.01, stop))
+        thread.start()
+        time.sleep(0.1)
+        page = self.write(os.path.join("content", "new.md"), "# new")
+        thread.join(5)
+        stop.set()
+        self.assertEqual(changes, [({page}, set())])
+
+    def test_start_server(self):
+        self.write("index.html", "<p>served</p>")
+        server = start_server(self.root, port=0, host="127.0.0.1")
+        try:
+            url = f"http://127.0.0.1:{server.server_port}/index.html"
+            with urllib.request.urlopen(url) as response:
+                self.assertEqual(response.read(), b"<p>served</p>")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from markdown_html import markdown_to_html_node, HeadingIndex
+from document_cache import DocumentCache, node_to_data, node_from_data
+
+
+class TestDocumentCache(unittest.TestCase):
+    md = "# Title\n\nSome **bold** text and a [link](/blog/post)\n\n- one\n- two"
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = os.path.join(self.tmp.name, "documents")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_node_data_round_trip(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode(None, "text"), LeafNode("a", "link", {"href": "/x"})]),
+            LeafNode("img", "", {"src": "/a.png", "alt": "a"}),
+        ])
+        data = node_to_data(node)
+        self.assertEqual(node_from_data(data).to_html(), node.to_html())
+        self.assertEqual(node_to_data(node_from_data(data)), data)
+
+    def test_miss_then_hit(self):
+        cache = DocumentCache(self.dir)
+        self.assertEqual(cache.markdown_to_html_node(self.md).to_html(),
+                         markdown_to_html_node(self.md).to_html())
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        cache.markdown_to_html_node(self.md)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_hit_from_disk(self):
+        DocumentCache(self.dir).markdown_to_html_node(self.md, "/site/")
+        cache = DocumentCache(self.dir)
+        node = cache.get(self.md, "/site/")
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(node.to_html(), markdown_to_html_node(self.md, "/site/").to_html())
+
+    def test_headings_cached(self):
+        DocumentCache(self.dir).markdown_to_html_node(self.md, "/", HeadingIndex(anchors=True))
+        cache = DocumentCache(self.dir)
+        headings = HeadingIndex(anchors=True)
+        node = cache.get(self.md, "/", headings)
+        self.assertEqual(headings.entries, [(1, "Title", "title")])
+        self.assertIn('<h1 id="title">', node.to_html())
+        # without anchors the tree has no ids, so it is a separate entry
+        self.assertIsNone(cache.get(self.md, "/", HeadingIndex()))
+
+    def test_basepath_in_key(self):
+        cache = DocumentCache(self.dir)
+        cache.markdown_to_html_node(self.md, "/")
+        self.assertIsNone(cache.get(self.md, "/site/"))
+
+    def test_memory_lru_bounded(self):
+        cache = DocumentCache(self.dir, max_entries=2)
+        for i in range(3):
+            cache.markdown_to_html_node(f"# page {i}")
+        self.assertEqual(len(cache.memory), 2)
+
+    def test_prune(self):
+        cache = DocumentCache(self.dir, max_bytes=0)
+        cache.markdown_to_html_node(self.md)
+        stale_version = os.path.join(self.dir, "0" * 16)
+        os.makedirs(stale_version)
+        self.assertEqual(cache.prune(), 1)
+        self.assertEqual(os.listdir(self.dir), [cache.version])
+        self.assertIsNone(DocumentCache(self.dir).get(self.md))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,8 @@
+import io
 import unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import (HTMLNode, LeafNode, ParentNode, intern_leaf, INTERN_MAX_VALUE,
+                      escape_text, escape_attribute, unescape_text)
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -50,6 +52,23 @@ class TestLeafNode(unittest.TestCase):
         node = LeafNode("a", "Click me!", {"href": "https://www.google.com"})
         self.assertEqual(node.to_html(), '<a href="https://www.google.com">Click me!</a>')
 
+    def test_leaf_to_html_props_escaped(self):
+        node = LeafNode("img", "", {"src": '/a"b.png?x=1&y=2', "alt": "<tom>"})
+        self.assertEqual(node.to_html(),
+                         '<img src="/a&quot;b.png?x=1&amp;y=2" alt="&lt;tom&gt;"></img>')
+
+    def test_escape_text(self):
+        self.assertEqual(escape_text("a < b && c > d"), "a &lt; b &amp;&amp; c &gt; d")
+        self.assertEqual(escape_text('"quoted"'), '"quoted"')
+        self.assertEqual(escape_attribute('say "hi"'), "say &quot;hi&quot;")
+        self.assertEqual(unescape_text("a &lt; b &amp; c"), "a < b & c")
+
+    def test_escape_clean_text_not_copied(self):
+        text = "".join(["clean ", "text"])
+        self.assertIs(escape_text(text), text)
+        self.assertIs(escape_attribute(text), text)
+        self.assertIs(unescape_text(text), text)
+
     def test_leaf_repr(self):
         node = LeafNode("a", "link to somewhere", {"href": "https://www.google.com"})
         self.assertEqual(
@@ -57,6 +76,23 @@ class TestLeafNode(unittest.TestCase):
             repr(node)
         )
 
+    def test_no_instance_dict(self):
+        node = LeafNode("b", "bold")
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.extra = 1
+
+    def test_intern_leaf(self):
+        node = intern_leaf("b", "bold")
+        self.assertIs(intern_leaf("b", "bold"), node)
+        self.assertIsNot(intern_leaf("i", "bold"), node)
+        self.assertEqual(node.to_html(), "<b>bold</b>")
+
+    def test_intern_leaf_long_value(self):
+        value = "x" * (INTERN_MAX_VALUE + 1)
+        self.assertIsNot(intern_leaf(None, value), intern_leaf(None, value))
+        self.assertEqual(intern_leaf(None, value).to_html(), value)
+
 class TestParentNode(unittest.TestCase):
     def test_parent_to_html_no_tag(self):
         child_node = LeafNode("span", "child")
@@ -99,5 +135,34 @@ class TestParentNode(unittest.TestCase):
             "<div><span><b>grandchild</b></span></div>",
         )
 
+    def test_parent_to_html_props(self):
+        node = ParentNode("h2", [LeafNode(None, "Intro")], {"id": "intro"})
+        self.assertEqual(node.to_html(), '<h2 id="intro">Intro</h2>')
+
+    def test_iter_html(self):
+        parent_node = ParentNode("div", [
+            ParentNode("p", [LeafNode("b", "bold"), LeafNode(None, " text")]),
+            LeafNode("a", "link", {"href": "/x"}),
+        ])
+        self.assertEqual(
+            list(parent_node.iter_html()),
+            ["<div>", "<p>", "<b>bold</b>", " text", "</p>", '<a href="/x">link</a>', "</div>"],
+        )
+
+    def test_write_html(self):
+        parent_node = ParentNode("ul", [
+            ParentNode("li", [LeafNode(None, "one")]),
+            ParentNode("li", [LeafNode("i", "two")]),
+        ])
+        buffer = io.StringIO()
+        parent_node.write_html(buffer)
+        self.assertEqual(buffer.getvalue(), parent_node.to_html())
+        self.assertEqual(buffer.getvalue(), "<ul><li>one</li><li><i>two</i></li></ul>")
+
+    def test_write_html_no_children(self):
+        parent_node = ParentNode("div", [ParentNode("p", [])])
+        with self.assertRaises(ValueError):
+            parent_node.write_html(io.StringIO())
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
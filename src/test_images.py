@@ -0,0 +1,121 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from images import Image, ResponsiveImages, image_size, resize_image
+from manifest import BuildManifest, hash_file
+
+
+def png_header(width, height):
+    return (b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" +
+            struct.pack(">II", width, height) + b"\x08\x06\x00\x00\x00")
+
+
+def jpeg_header(width, height):
+    app0 = b"JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00"
+    sof0 = struct.pack(">BHHB", 8, height, width, 3) + b"\x01\x22\x00" * 3
+    return (b"\xff\xd8" + b"\xff\xe0" + struct.pack(">H", len(app0) + 2) + app0 +
+            b"\xff\xff\xc0" + struct.pack(">H", len(sof0) + 2) + sof0)
+
+
+class TestImages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.image = os.path.join(self.static, "images", "hall.png")
+        self.write(self.image, png_header(1200, 800))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(data)
+
+    def test_image_size(self):
+        gif = os.path.join(self.tmp.name, "a.gif")
+        jpeg = os.path.join(self.tmp.name, "a.jpg")
+        text = os.path.join(self.tmp.name, "a.txt")
+        self.write(gif, b"GIF89a" + struct.pack("<HH", 30, 20) + b"\x00" * 10)
+        self.write(jpeg, jpeg_header(640, 480))
+        self.write(text, b"not an image")
+        self.assertEqual(image_size(self.image), (1200, 800))
+        self.assertEqual(image_size(gif), (30, 20))
+        self.assertEqual(image_size(jpeg), (640, 480))
+        self.assertIsNone(image_size(text))
+        self.assertIsNone(image_size(os.path.join(self.tmp.name, "missing.png")))
+
+    def test_truncated_jpeg(self):
+        jpeg = os.path.join(self.tmp.name, "a.jpg")
+        self.write(jpeg, jpeg_header(640, 480)[:12])
+        self.assertIsNone(image_size(jpeg))
+
+    def test_rewrite_adds_size(self):
+        images = ResponsiveImages(self.static, "/site/", widths=())
+        img = LeafNode("img", "", {"src": "/site/images/hall.png", "alt": "Hall"})
+        tree = ParentNode("p", [LeafNode(None, "text"), img])
+        used = set()
+        rewritten = images.rewrite(tree, used)
+        self.assertEqual(rewritten.to_html(),
+                         '<p>text<img src="/site/images/hall.png" alt="Hall" width="1200" '
+                         'height="800" loading="lazy"></img></p>')
+        self.assertEqual(used, {self.image})
+        # cached nodes are shared between pages and must not change
+        self.assertEqual(img.props, {"src": "/site/images/hall.png", "alt": "Hall"})
+
+    def test_rewrite_leaves_other_images(self):
+        images = ResponsiveImages(self.static, "/site/")
+        tree = ParentNode("p", [
+            LeafNode("img", "", {"src": "https://example.com/images/hall.png", "alt": ""}),
+            LeafNode("img", "", {"src": "/site/images/missing.png", "alt": ""}),
+            LeafNode("img", "", {"src": "/site/../static/images/hall.png", "alt": ""}),
+        ])
+        used = set()
+        self.assertIs(images.rewrite(tree, used), tree)
+        self.assertEqual(used, set())
+
+    def test_srcset(self):
+        images = ResponsiveImages(self.static, "/site/")
+        images.widths = (480, 960, 1600)
+        img = LeafNode("img", "", {"src": "/site/images/hall.png", "alt": "Hall"})
+        props = images.rewrite(img, set()).props
+        self.assertEqual(props["srcset"],
+                         "/site/images/hall-480w.png 480w, /site/images/hall-960w.png 960w, "
+                         "/site/images/hall.png 1200w")
+
+    def test_write_derivatives_from_cache(self):
+        root = os.path.join(self.tmp.name, "docs")
+        cache_dir = os.path.join(self.tmp.name, "cache")
+        images = ResponsiveImages(self.static, "/")
+        images.widths = (480,)
+        digest = hash_file(self.image)
+        # a derivative resized by an earlier build
+        self.write(os.path.join(cache_dir, digest[:2], f"{digest}-480w.png"), b"small")
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"), root)
+        self.assertEqual(images.write_derivatives([self.image], root, cache_dir, manifest),
+                         (0, 1))
+        dest_path = os.path.join(root, "images", "hall-480w.png")
+        with open(dest_path, "rb") as file:
+            self.assertEqual(file.read(), b"small")
+        self.assertEqual(manifest.new, {os.path.join("images", "hall-480w.png"):
+                                        {"image": self.image, "hash": digest, "width": 480}})
+
+        manifest = BuildManifest(manifest.path, root, manifest.new)
+        self.assertEqual(images.write_derivatives([self.image], root, cache_dir, manifest),
+                         (0, 0))
+        self.assertEqual(len(manifest.new), 1)
+
+    @unittest.skipIf(Image is None, "Pillow isn't installed")
+    def test_resize_image(self):
+        src = os.path.join(self.tmp.name, "big.png")
+        Image.new("RGB", (200, 100)).save(src)
+        dest = os.path.join(self.tmp.name, "cache", "small.png")
+        resize_image(src, dest, 50)
+        self.assertEqual(image_size(dest), (50, 25))
+
+
+if __name__ == "__main__":
+    unittest.main()
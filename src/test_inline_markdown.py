@@ -226,6 +226,35 @@ class TestInlineMarkdown(unittest.TestCase):
         )
 
 
+class TestTextToTextnodesScanner(unittest.TestCase):
+    def split_pipeline(self, text):
+        nodes = [TextNode(text, TextType.TEXT)]
+        nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+        nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+        nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+        nodes = split_nodes_image(nodes)
+        return split_nodes_link(nodes)
+
+    def test_same_as_split_pipeline(self):
+        texts = [
+            "",
+            "plain text only",
+            "**bold _not italic_ inside** then _italic `not code` inside_",
+            "`code with [link](/a) inside` and [link](/b)",
+            "[a](/1)[b](/2)![c](/3.png)[d](/4)",
+            "**[link in bold](/a)** and _![image in italic](/b.png)_",
+            "![img](/a.png) **** empty bold and [unclosed link(/b)",
+            "> quote line\n> with [link](/x) on next line",
+        ]
+        for text in texts:
+            self.assertListEqual(self.split_pipeline(text), text_to_textnodes(text), text)
+
+    def test_missing_closing_delimiter(self):
+        for text in ["**bold", "a _b", "`code", "**bold** _a `b` c"]:
+            with self.assertRaises(Exception):
+                text_to_textnodes(text)
+
+
 class TestExtractMarkdown(unittest.TestCase):
     def test_extract_markdown_images(self):
         matches = extract_markdown_images(
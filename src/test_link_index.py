@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+
+from link_index import LinkIndex, collect_links, link_targets
+from markdown_html import markdown_to_html_node
+
+
+class TestLinkIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "public")
+        self.path = os.path.join(self.tmp.name, "links.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_collect_links(self):
+        node = markdown_to_html_node(
+            "# Title\n\nSee [home](/) and ![tom](/images/tom.png)\n\n- [out](https://boot.dev)",
+            "/site/", cache=None)
+        self.assertEqual(collect_links(node), [
+            ["link", "/site/"],
+            ["image", "/site/images/tom.png"],
+            ["link", "https://boot.dev"],
+        ])
+
+    def test_link_targets(self):
+        page = os.path.join("blog", "tom", "index.html")
+        self.assertEqual(link_targets("/site/", page, "/site/"), ("index.html",))
+        self.assertEqual(link_targets("/site/contact", page, "/site/"),
+                         ("contact", "contact/index.html"))
+        self.assertEqual(link_targets("/site/blog/#top", page, "/site/"),
+                         ("blog/index.html",))
+        self.assertEqual(link_targets("../glorfindel", page),
+                         ("blog/glorfindel", "blog/glorfindel/index.html"))
+        self.assertEqual(link_targets("https://boot.dev/x", page), ())
+        self.assertEqual(link_targets("#section", page), ())
+
+    def test_check_and_backlinks(self):
+        index = LinkIndex(self.path, self.root)
+        home = os.path.join(self.root, "index.html")
+        contact = os.path.join(self.root, "contact", "index.html")
+        index.record(home, "content/index.md", {"source": "a"},
+                     [["link", "/contact"], ["image", "/images/missing.png"]])
+        index.record(contact, "content/contact/index.md", {"source": "b"},
+                     [["link", "/"], ["link", "/blog/nothere"]])
+        outputs = ["index.html", os.path.join("contact", "index.html")]
+        self.assertEqual(index.check(outputs), [
+            ("content/contact/index.md", "link", "/blog/nothere"),
+            ("content/index.md", "image", "/images/missing.png"),
+        ])
+        self.assertEqual(index.backlinks(outputs), {
+            "index.html": ["content/contact/index.md"],
+            "contact/index.html": ["content/index.md"],
+        })
+
+    def test_saved_entries_current(self):
+        index = LinkIndex(self.path, self.root)
+        dest = os.path.join(self.root, "index.html")
+        index.record(dest, "content/index.md", {"source": "a"}, [["link", "/"]])
+        index.save()
+
+        index = LinkIndex.load(self.path, self.root)
+        self.assertTrue(index.is_current(dest, {"source": "a"}))
+        self.assertFalse(index.is_current(dest, {"source": "b"}))
+        index.keep_previous(dest)
+        self.assertEqual(index.new["index.html"]["links"], [["link", "/"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
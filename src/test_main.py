@@ -1,6 +1,21 @@
+import contextlib
+import io
+import os
+import tempfile
 import unittest
 
-from main import extract_title
+from main import (
+    build,
+    extract_title,
+    rebuild_changed,
+    collect_pages,
+    generate_page,
+    generate_pages_recursively,
+    merge_shards,
+    parse_args,
+)
+from async_build import PipelineOptions
+from shard import Shard
 
 class TestMain(unittest.TestCase):
     def test_extract_title(self):
@@ -22,7 +37,265 @@ paragraph
 """
         with self.assertRaises(Exception):
             extract_title(md)
-        
+
+    def test_extract_title_like_pages(self):
+        md = "```\n# not a heading\n```\n\n# The **Title**"
+        self.assertEqual(extract_title(md), "The Title")
+
+
+    def test_pipeline_stage_counts(self):
+        args = parse_args(["--pipeline", "--pipeline-writers", "2"])
+        self.assertEqual(args.pipeline_writers, 2)
+        for flag in ("--pipeline-readers", "--pipeline-renderers",
+                     "--pipeline-writers", "--pipeline-queue"):
+            for value in ("0", "-1", "x"):
+                with self.subTest(flag=flag, value=value), \
+                        contextlib.redirect_stderr(io.StringIO()), \
+                        self.assertRaises(SystemExit):
+                    parse_args(["--pipeline", flag, value])
+
+
+class TestGeneratePages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.write(self.template, "<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[post](/blog/post)")
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\n- a\n- b")
+        self.write(os.path.join(self.content, "notes.txt"), "not markdown")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(text)
+
+    def read_tree(self, root):
+        files = {}
+        for dir_path, _, file_names in os.walk(root):
+            for name in file_names:
+                path = os.path.join(dir_path, name)
+                with open(path) as file:
+                    files[os.path.relpath(path, root)] = file.read()
+        return files
+
+    def test_collect_pages(self):
+        dest = os.path.join(self.tmp.name, "public")
+        pages = collect_pages(self.content, dest)
+        self.assertEqual(
+            sorted(pages),
+            [(os.path.join(self.content, "blog", "post", "index.md"),
+              os.path.join(dest, "blog", "post", "index.html")),
+             (os.path.join(self.content, "index.md"),
+              os.path.join(dest, "index.html"))]
+        )
+        self.assertTrue(os.path.isdir(os.path.join(dest, "blog", "post")))
+
+    def test_streaming_matches_in_memory(self):
+        source = os.path.join(self.content, "long.md")
+        self.write(source, "# Long\n\n" + "".join(
+            f"para {i} with **bold** and [link](/page/{i})\n\n> quote {i}\n\n" for i in range(50)))
+        streamed = os.path.join(self.tmp.name, "out", "streamed.html")
+        in_memory = os.path.join(self.tmp.name, "out", "in_memory.html")
+        generate_page(source, self.template, streamed, "/site/", stream=True)
+        generate_page(source, self.template, in_memory, "/site/", stream=False)
+        with open(streamed) as first, open(in_memory) as second:
+            self.assertEqual(first.read(), second.read())
+
+    def test_streaming_title_matches_in_memory(self):
+        source = os.path.join(self.content, "title.md")
+        self.write(source, "```\n# not a title\n```\n\n# Hello **world** & <friends>\n\ntext")
+        streamed = os.path.join(self.tmp.name, "out", "streamed.html")
+        in_memory = os.path.join(self.tmp.name, "out", "in_memory.html")
+        for toc in (False, True):
+            generate_page(source, self.template, streamed, "/", stream=True, toc=toc)
+            generate_page(source, self.template, in_memory, "/", stream=False, toc=toc)
+            with open(streamed) as first, open(in_memory) as second:
+                html = first.read()
+                self.assertEqual(html, second.read())
+            self.assertIn("<title>Hello world &amp; &lt;friends&gt;</title>", html)
+
+    def test_parallel_matches_serial(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        parallel = os.path.join(self.tmp.name, "parallel")
+        os.mkdir(serial)
+        os.mkdir(parallel)
+        generate_pages_recursively(self.content, self.template, serial, "/site/")
+        generate_pages_recursively(self.content, self.template, parallel, "/site/", jobs=2)
+        self.assertEqual(self.read_tree(serial), self.read_tree(parallel))
+
+    def test_parallel_reports_failures_per_page(self):
+        self.write(os.path.join(self.content, "broken.md"), "no title")
+        dest = os.path.join(self.tmp.name, "public")
+        os.mkdir(dest)
+        failures = generate_pages_recursively(self.content, self.template, dest, "/", jobs=2)
+        self.assertEqual([path for path, _ in failures],
+                         [os.path.join(self.content, "broken.md")])
+        self.assertTrue(os.path.exists(os.path.join(dest, "index.html")))
+        self.assertTrue(os.path.exists(os.path.join(dest, "blog", "post", "index.html")))
+
+    def test_pipeline_matches_serial(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        os.mkdir(serial)
+        generate_pages_recursively(self.content, self.template, serial, "/site/")
+        for renderers in (1, 2):
+            dest = os.path.join(self.tmp.name, f"pipeline{renderers}")
+            os.mkdir(dest)
+            options = PipelineOptions(readers=2, renderers=renderers, writers=2, queue_size=1)
+            failures = generate_pages_recursively(self.content, self.template, dest, "/site/",
+                                                  pipeline=options)
+            self.assertEqual(failures, [])
+            self.assertEqual(self.read_tree(serial), self.read_tree(dest))
+
+    def test_shards_together_match_serial(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        sharded = os.path.join(self.tmp.name, "sharded")
+        os.mkdir(serial)
+        os.mkdir(sharded)
+        generate_pages_recursively(self.content, self.template, serial, "/site/")
+        for number in (1, 2):
+            generate_pages_recursively(self.content, self.template, sharded, "/site/",
+                                       shard=Shard(number, 2))
+        self.assertEqual(self.read_tree(serial), self.read_tree(sharded))
+
+    def test_pipeline_reports_failures_per_page(self):
+        self.write(os.path.join(self.content, "broken.md"), "no title")
+        dest = os.path.join(self.tmp.name, "public")
+        os.mkdir(dest)
+        failures = generate_pages_recursively(self.content, self.template, dest, "/",
+                                              pipeline=PipelineOptions())
+        self.assertEqual([path for path, _ in failures],
+                         [os.path.join(self.content, "broken.md")])
+        self.assertTrue(os.path.exists(os.path.join(dest, "index.html")))
+
+
+
+class SiteTestCase(unittest.TestCase):
+    """ Runs in a site directory, since main's paths are relative to the
+     working directory.
+     """
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.write("template.html", "<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.write("content/index.md", "# Home\n\n[post](/post)")
+        self.write("content/post/index.md", "# Post\n\ntext")
+        self.write("static/style.css", "body {}")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as file:
+            file.write(text)
+
+    def read(self, path):
+        with open(path) as file:
+            return file.read()
+
+    def build(self, *args, **kwargs):
+        """ Run build and return what it printed. """
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            build(*args, **kwargs)
+        return output.getvalue()
+
+    def read_tree(self, root):
+        files = {}
+        for dir_path, _, file_names in os.walk(root):
+            for name in file_names:
+                path = os.path.join(dir_path, name)
+                with open(path, "rb") as file:
+                    files[os.path.relpath(path, root)] = file.read()
+        return files
+
+
+class TestRebuildChanged(SiteTestCase):
+    """ The serve --watch rebuild. """
+    def setUp(self):
+        super().setUp()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.manifest, _ = build("/")
+
+    def rebuild(self, changed=(), removed=()):
+        """ Run rebuild_changed and return what it printed. """
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            rebuild_changed(set(changed), set(removed), "/", self.manifest)
+        return output.getvalue()
+
+    def assert_build_current(self):
+        """ Check that a full build finds nothing left to regenerate. """
+        output = self.build("/")
+        self.assertNotIn("Generating page", output)
+        self.assertNotIn("Copying file", output)
+
+    def test_edit_page(self):
+        self.write("content/post/index.md", "# Edited\n\ntext")
+        output = self.rebuild(changed=["content/post/index.md"])
+        self.assertIn("Generating page from content/post/index.md", output)
+        self.assertNotIn("content/index.md", output)
+        self.assertIn("<title>Edited</title>", self.read("docs/post/index.html"))
+        self.assert_build_current()
+
+    def test_change_template(self):
+        self.write("template.html", "<h1>{{ Title }}</h1>{{ Content }}")
+        output = self.rebuild(changed=["template.html"])
+        self.assertEqual(output.count("Generating page"), 2)
+        self.assertTrue(self.read("docs/index.html").startswith("<h1>Home</h1>"))
+        self.assert_build_current()
+
+    def test_add_and_remove_page(self):
+        self.write("content/new/index.md", "# New\n\n[home](/)")
+        self.rebuild(changed=["content/new/index.md"])
+        self.assertIn("<title>New</title>", self.read("docs/new/index.html"))
+        self.assert_build_current()
+
+        os.remove("content/post/index.md")
+        output = self.rebuild(removed=["content/post/index.md"])
+        self.assertFalse(os.path.exists("docs/post"))
+        self.assertIn("Broken link in content/index.md: /post", output)
+        self.assert_build_current()
+
+    def test_change_static_file(self):
+        self.write("static/style.css", "body { color: red }")
+        output = self.rebuild(changed=["static/style.css"])
+        self.assertIn("Copying file: static/style.css", output)
+        self.assertEqual(self.read("docs/style.css"), "body { color: red }")
+        self.assert_build_current()
+
+        # the manifest now holds the new file, so an unchanged one isn't copied again
+        output = self.rebuild(changed=["static/style.css"])
+        self.assertNotIn("Copying file", output)
+
+
+
+class TestMergeShards(SiteTestCase):
+    def test_merged_site_matches_unsharded_build(self):
+        for i in range(6):
+            self.write(f"content/page{i}/index.md", f"# Page {i}\n\nwords of page {i}")
+        for number in range(1, 4):
+            self.build("/", shard=Shard(number, 3), search_index=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            merge_shards(3, "/", search_index=True)
+        merged = self.read_tree("docs")
+        self.assertIn(os.path.join("search", "index.json"), merged)
+
+        # the merged state lets a build of the whole site skip every page
+        output = self.build("/", search_index=True)
+        self.assertNotIn("Generating page", output)
+        self.assertNotIn("Wrote search index", output)
+        self.assertEqual(self.read_tree("docs"), merged)
+
+        self.build("/", force=True, search_index=True)
+        self.assertEqual(self.read_tree("docs"), merged)
+
 
 if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    unittest.main()
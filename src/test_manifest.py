@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+
+from manifest import BuildManifest, hash_file
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "public")
+        self.path = os.path.join(self.tmp.name, "cache", "manifest.json")
+        os.mkdir(self.root)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(text)
+
+    def test_hash_file(self):
+        path = os.path.join(self.tmp.name, "a.md")
+        self.write(path, "# title")
+        other = os.path.join(self.tmp.name, "b.md")
+        self.write(other, "# other title")
+        self.assertEqual(hash_file(path), hash_file(path))
+        self.assertNotEqual(hash_file(path), hash_file(other))
+
+    def test_load_missing(self):
+        self.assertIsNone(BuildManifest.load(self.path, self.root))
+
+    def test_fresh_after_save(self):
+        dest = os.path.join(self.root, "index.html")
+        self.write(dest, "<p>hi</p>")
+        manifest = BuildManifest(self.path, self.root)
+        manifest.record(dest, {"source": "abc", "basepath": "/"})
+        manifest.save()
+
+        manifest = BuildManifest.load(self.path, self.root)
+        self.assertTrue(manifest.is_fresh(dest, {"source": "abc", "basepath": "/"}))
+        self.assertFalse(manifest.is_fresh(dest, {"source": "abc", "basepath": "/site/"}))
+        self.assertFalse(manifest.is_fresh(dest, {"source": "def", "basepath": "/"}))
+
+    def test_not_fresh_when_output_missing(self):
+        dest = os.path.join(self.root, "index.html")
+        manifest = BuildManifest(self.path, self.root, {"index.html": {"source": "abc"}})
+        self.assertFalse(manifest.is_fresh(dest, {"source": "abc"}))
+
+    def test_explain(self):
+        dest = os.path.join(self.root, "index.html")
+        self.write(dest, "<p>hi</p>")
+        inputs = {"source": "content/index.md", "basepath": "/",
+                  "files": {"content/index.md": "a", "template.html": "t"}}
+        manifest = BuildManifest(self.path, self.root, {"index.html": inputs})
+        self.assertEqual(manifest.explain(dest, inputs), [])
+        changed = dict(inputs, basepath="/site/",
+                       files={"content/index.md": "b", "header.md": "h"})
+        self.assertEqual(manifest.explain(dest, changed), [
+            "content/index.md changed",
+            "new dependency header.md",
+            "no longer depends on template.html",
+            "basepath changed from '/' to '/site/'",
+        ])
+        other = os.path.join(self.root, "other.html")
+        self.assertEqual(manifest.explain(other, inputs), ["not in the previous build"])
+        os.remove(dest)
+        self.assertEqual(manifest.explain(dest, inputs), ["output file is missing"])
+
+    def test_dependents(self):
+        manifest = BuildManifest(self.path, self.root)
+        index = os.path.join(self.root, "index.html")
+        contact = os.path.join(self.root, "contact", "index.html")
+        manifest.record(index, {"files": {"content/index.md": "a", "template.html": "t"}})
+        manifest.record(contact, {"files": {"content/contact/index.md": "b",
+                                            "template.html": "t"}})
+        self.assertEqual([path for path, _ in manifest.dependents("template.html")],
+                         [index, contact])
+        self.assertEqual([path for path, _ in manifest.dependents("content/index.md")],
+                         [index])
+
+    def test_remove_stale_outputs(self):
+        kept = os.path.join(self.root, "index.html")
+        stale = os.path.join(self.root, "blog", "old", "index.html")
+        self.write(kept, "kept")
+        self.write(stale, "stale")
+        manifest = BuildManifest(self.path, self.root, {
+            "index.html": {"source": "a"},
+            os.path.join("blog", "old", "index.html"): {"source": "b"},
+        })
+        manifest.record(kept, {"source": "a"})
+
+        self.assertEqual(manifest.remove_stale_outputs(), [stale])
+        self.assertTrue(os.path.exists(kept))
+        self.assertFalse(os.path.exists(os.path.join(self.root, "blog")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 
-from markdown_html import markdown_to_html_node
+from markdown_html import (markdown_to_html_node, iter_block_nodes, BlockCache, HeadingIndex,
+                           collect_headings, slugify)
 
 
 class TestInlineMarkdown(unittest.TestCase):
@@ -107,5 +108,152 @@ the **same** even with inline stuff
         )
         
 
+    def test_markers_removed_once(self):
+        md = """
+# #hashtag heading
+
+- -5 degrees
+- item
+
+1. 1984 was a year
+2. 2. twice
+
+> > nested
+"""
+        html = markdown_to_html_node(md, cache=None).to_html()
+        self.assertEqual(
+            html,
+            "<div><h1>#hashtag heading</h1>"
+            "<ul><li>-5 degrees</li><li>item</li></ul>"
+            "<ol><li>1984 was a year</li><li>2. twice</li></ol>"
+            "<blockquote>&gt; nested\n</blockquote></div>",
+        )
+
+    def test_ol_longer_than_prefix_table(self):
+        md = "\n".join(f"{i}. item {i}" for i in range(1, 151))
+        html = markdown_to_html_node(md, cache=None).to_html()
+        self.assertTrue(html.endswith("<li>item 150</li></ol></div>"))
+
+
+    def test_code_escaped(self):
+        md = "```\nif a < b:\n    print('<&>')\n```"
+        html = markdown_to_html_node(md, cache=None).to_html()
+        self.assertEqual(html, "<div><pre><code>if a &lt; b:\n    print('&lt;&amp;&gt;')</code></pre></div>")
+
+
+class TestIterBlockNodes(unittest.TestCase):
+    def test_lazy(self):
+        lines = iter(["# title\n", "\n", "text\n", "\n", "- a\n"])
+        nodes = iter_block_nodes(lines, cache=None)
+        self.assertEqual(next(nodes).to_html(), "<h1>title</h1>")
+        # only the lines of the first block and the blank line after it were read
+        self.assertEqual(next(lines), "text\n")
+
+
+class TestHeadingIndex(unittest.TestCase):
+    md = """
+# The **Title**
+
+## Intro
+
+### Details, details
+
+## Intro
+
+# Another
+"""
+
+    def test_index(self):
+        headings = HeadingIndex()
+        html = markdown_to_html_node(self.md, cache=None, headings=headings).to_html()
+        self.assertEqual(headings.entries, [
+            (1, "The Title", "the-title"),
+            (2, "Intro", "intro"),
+            (3, "Details, details", "details-details"),
+            (2, "Intro", "intro-1"),
+            (1, "Another", "another"),
+        ])
+        self.assertEqual(headings.title(), "The Title")
+        self.assertNotIn("id=", html)
+
+    def test_anchors(self):
+        headings = HeadingIndex(anchors=True)
+        html = markdown_to_html_node(self.md, cache=None, headings=headings).to_html()
+        self.assertIn('<h2 id="intro">Intro</h2>', html)
+        self.assertIn('<h2 id="intro-1">Intro</h2>', html)
+
+    def test_cached_nodes_unchanged(self):
+        cache = BlockCache()
+        markdown_to_html_node(self.md, cache=cache, headings=HeadingIndex(anchors=True))
+        self.assertNotIn("id=", markdown_to_html_node(self.md, cache=cache).to_html())
+
+    def test_toc(self):
+        headings = collect_headings(self.md.split("\n"))
+        self.assertEqual(
+            headings.toc_node().to_html(),
+            '<ul><li><a href="#the-title">The Title</a><ul>'
+            '<li><a href="#intro">Intro</a><ul>'
+            '<li><a href="#details-details">Details, details</a></li></ul></li>'
+            '<li><a href="#intro-1">Intro</a></li></ul></li>'
+            '<li><a href="#another">Another</a></li></ul>',
+        )
+        self.assertEqual(HeadingIndex().toc_node(), "")
+
+    def test_no_title(self):
+        headings = HeadingIndex()
+        markdown_to_html_node("## only h2", cache=None, headings=headings)
+        with self.assertRaises(Exception):
+            headings.title()
+
+    def test_escaped_heading(self):
+        headings = HeadingIndex(anchors=True)
+        html = markdown_to_html_node("# Fish & <Chips>", cache=None, headings=headings).to_html()
+        self.assertEqual(html, '<div><h1 id="fish-chips">Fish &amp; &lt;Chips&gt;</h1></div>')
+        self.assertEqual(headings.title(), "Fish & <Chips>")
+        self.assertEqual(headings.toc_node().to_html(),
+                         '<ul><li><a href="#fish-chips">Fish &amp; &lt;Chips&gt;</a></li></ul>')
+
+    def test_slugify(self):
+        self.assertEqual(slugify('The "Lord" of_the Rings!'), "the-lord-of_the-rings")
+        self.assertEqual(slugify("???"), "")
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_unchanged_blocks_hit(self):
+        cache = BlockCache()
+        md = "# title\n\nfirst paragraph\n\n- a\n- b"
+        first = markdown_to_html_node(md, cache=cache)
+        self.assertEqual(cache.info(), {"hits": 0, "misses": 3, "size": 3})
+
+        edited = md.replace("first", "edited")
+        second = markdown_to_html_node(edited, cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+        self.assertIs(first.children[0], second.children[0])
+        self.assertEqual(second.to_html(), markdown_to_html_node(edited, cache=None).to_html())
+
+    def test_basepath_in_key(self):
+        cache = BlockCache()
+        md = "[post](/blog/post)"
+        markdown_to_html_node(md, "/", cache)
+        node = markdown_to_html_node(md, "/site/", cache)
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(node.to_html(), '<div><p><a href="/site/blog/post">post</a></p></div>')
+
+    def test_bounded(self):
+        cache = BlockCache(max_entries=2)
+        markdown_to_html_node("one\n\ntwo", cache=cache)
+        markdown_to_html_node("three\n\nfour", cache=cache)
+        self.assertEqual(list(key for key, _ in cache.nodes), ["three", "four"])
+
+    def test_document_larger_than_cache(self):
+        cache = BlockCache(max_entries=100)
+        blocks = [f"paragraph {i}" for i in range(250)]
+        markdown_to_html_node("\n\n".join(blocks), cache=cache)
+        blocks[120] = "edited paragraph"
+        markdown_to_html_node("\n\n".join(blocks), cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (249, 251))
+        self.assertGreaterEqual(cache.max_entries, 250)
+
+
 if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    unittest.main()
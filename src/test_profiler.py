@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+import markdown_html
+import profiler
+from profiler import BuildProfile
+
+
+class TestBuildProfile(unittest.TestCase):
+    def tearDown(self):
+        profiler.uninstall()
+
+    def test_nested_phases_are_exclusive(self):
+        profile = BuildProfile()
+        with profile.phase("outer"):
+            time.sleep(0.01)
+            with profile.phase("inner"):
+                time.sleep(0.02)
+        self.assertGreaterEqual(profile.phases["inner"], 0.02)
+        self.assertLess(profile.phases["outer"], 0.02)
+        self.assertEqual(dict(profile.calls), {"outer": 1, "inner": 1})
+
+    def test_wrap_iter(self):
+        profile = BuildProfile()
+        timed = profile.wrap_iter(lambda: iter([1, 2, 3]), "items")
+        self.assertEqual(list(timed()), [1, 2, 3])
+        self.assertEqual(profile.calls["items"], 4)
+
+    def test_install_hooks_parser(self):
+        profile = BuildProfile()
+        profiler.install(profile)
+        markdown_html.markdown_to_html_node("# title\n\nsome **text**\n\n- a\n- b", cache=None)
+        profiler.uninstall()
+        self.assertEqual(profile.calls["markdown_to_blocks"], 4)
+        self.assertEqual(profile.calls["block_to_block_type"], 3)
+        self.assertEqual(profile.calls["text_to_textnodes"], 4)
+        self.assertIsNone(profiler.active)
+        self.assertNotIn("timed", markdown_html.text_to_textnodes.__name__)
+
+    def test_phase_without_active_profile(self):
+        with profiler.phase("nothing"):
+            pass
+        self.assertIsNone(profiler.active)
+
+    def test_report_and_json(self):
+        profile = BuildProfile()
+        profile.merge({"markdown read": 0.5, "file write": 0.25}, {"markdown read": 2})
+        profile.add_page("a.md", 0.1, 1000)
+        profile.add_page("b.md", 0.3, 3000)
+        data = profile.to_dict(elapsed=2.0, slowest=1)
+        self.assertEqual(data["pages_per_second"], 1.0)
+        self.assertEqual(data["slowest"], [{"path": "b.md", "seconds": 0.3, "bytes": 3000}])
+        self.assertEqual(list(data["phases"]), ["markdown read", "file write"])
+        self.assertIn("b.md", profile.report(2.0))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "profile.json")
+            profile.write_json(path, 2.0)
+            with open(path) as file:
+                self.assertEqual(json.load(file)["bytes"], 4000)
+
+
+if __name__ == "__main__":
+    unittest.main()
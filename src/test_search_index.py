@@ -0,0 +1,107 @@
+import json
+import os
+import tempfile
+import unittest
+
+from manifest import BuildManifest
+from markdown_html import markdown_to_html_node
+from search_index import SearchIndexBuilder, count_terms, page_url, shard_name
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "public")
+        self.cache_dir = os.path.join(self.tmp.name, "search")
+        os.mkdir(self.root)
+        self.manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"), self.root)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def builder(self, max_postings=1_000_000):
+        builder = SearchIndexBuilder(self.cache_dir, self.root, "/site/", max_postings)
+        pages = {
+            "index.html": {"the": 2, "ring": 1},
+            os.path.join("blog", "tom", "index.html"): {"the": 1, "tom": 3},
+            os.path.join("contact", "index.html"): {"ring": 1, "contact": 1},
+        }
+        for key, terms in pages.items():
+            builder.add_page(os.path.join(self.root, key), {"source": key}, key, terms)
+        return builder
+
+    def read(self, name):
+        with open(os.path.join(self.root, "search", name)) as file:
+            return json.load(file)
+
+    def test_count_terms(self):
+        node = markdown_to_html_node("# The Ring\n\nThe **ring** and ![Tom](/tom.png)", cache=None)
+        self.assertEqual(count_terms(node), {"the": 2, "ring": 2, "and": 1, "tom": 1})
+
+    def test_page_url(self):
+        self.assertEqual(page_url("index.html", "/site/"), "/site/")
+        self.assertEqual(page_url(os.path.join("blog", "index.html")), "/blog/")
+        self.assertEqual(page_url("about.html"), "/about.html")
+
+    def test_write(self):
+        self.assertTrue(self.builder().write(self.manifest))
+        index = self.read("index.json")
+        self.assertEqual([url for url, _ in index["documents"]],
+                         ["/site/blog/tom/", "/site/contact/", "/site/"])
+        self.assertEqual(self.read(shard_name("the") + ".json"),
+                         {"the": [[0, 1], [2, 2]]})
+        self.assertEqual(self.read(shard_name("ring") + ".json"),
+                         {"ring": [[1, 1], [2, 1]]})
+        self.assertEqual(len(self.manifest.new), len(index["shards"]) + 1)
+
+    def test_spilled_runs_match(self):
+        self.builder().write(self.manifest)
+        expected = {name: self.read(name) for name in os.listdir(os.path.join(self.root, "search"))}
+        self.manifest = BuildManifest(self.manifest.path, self.root)
+        self.builder(max_postings=1).write(self.manifest)
+        actual = {name: self.read(name) for name in os.listdir(os.path.join(self.root, "search"))}
+        self.assertEqual(actual, expected)
+
+    def test_unchanged_index_kept(self):
+        self.builder().write(self.manifest)
+        manifest = BuildManifest(self.manifest.path, self.root, self.manifest.new)
+        builder = SearchIndexBuilder(self.cache_dir, self.root, "/site/")
+        for key in ("index.html", os.path.join("blog", "tom", "index.html"),
+                    os.path.join("contact", "index.html")):
+            self.assertTrue(builder.add(os.path.join(self.root, key), {"source": key}))
+        self.assertFalse(builder.write(manifest))
+        self.assertEqual(manifest.new, self.manifest.new)
+        self.assertFalse(builder.add(os.path.join(self.root, "index.html"), {"source": "x"}))
+
+
+    def test_other_outputs_in_directory_kept(self):
+        page = os.path.join(self.root, "search", "index.html")
+        os.makedirs(os.path.dirname(page))
+        with open(page, "w") as file:
+            file.write("search page")
+        self.manifest.record(page, {"source": "content/search/index.md"})
+        self.builder().write(self.manifest)
+        self.assertTrue(os.path.isfile(page))
+
+        manifest = BuildManifest(self.manifest.path, self.root, self.manifest.new)
+        manifest.record(page, {"source": "content/search/index.md"})
+        builder = SearchIndexBuilder(self.cache_dir, self.root, "/site/")
+        builder.add_page(os.path.join(self.root, "index.html"), {"source": "index.html"},
+                         "Home", {"home": 1})
+        self.assertTrue(builder.write(manifest))
+        removed = manifest.remove_stale_outputs()
+        self.assertTrue(os.path.isfile(page))
+        self.assertNotIn(page, removed)
+        self.assertIn(os.path.join(self.root, "search", shard_name("the") + ".json"), removed)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.root, "search"))),
+                         sorted([shard_name("home") + ".json", "index.html", "index.json"]))
+
+    def test_collision_fails(self):
+        static = os.path.join(self.root, "search", "index.json")
+        self.manifest.record(static, {"source": "abc", "size": 3, "mtime": 0})
+        with self.assertRaises(Exception):
+            self.builder().write(self.manifest)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+
+from shard import Shard, partition, shard_index, stable_hash
+
+
+class TestShard(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "content")
+        self.pages = []
+        for i, size in enumerate([900, 500, 400, 300, 300, 100, 100, 0]):
+            path = os.path.join(self.root, f"page{i}", "index.md")
+            os.makedirs(os.path.dirname(path))
+            with open(path, "w") as file:
+                file.write("x" * size)
+            self.pages.append((path, path.replace(".md", ".html")))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parse(self):
+        shard = Shard.parse("2/4")
+        self.assertEqual((shard.number, shard.count, shard.name), (2, 4, "2-of-4"))
+        for text in ["2", "0/4", "5/4", "a/b", "1/0", "-1/2"]:
+            with self.assertRaises(ValueError):
+                Shard.parse(text)
+
+    def test_partition_covers_every_page_once(self):
+        shards = partition(self.pages, 3, self.root)
+        self.assertEqual(sorted(item for shard in shards for item in shard), sorted(self.pages))
+
+    def test_partition_spreads_pages(self):
+        paths = [os.path.join(self.root, f"post{i}", "index.md") for i in range(1000)]
+        counts = [0] * 4
+        for path in paths:
+            counts[shard_index(path, 4, self.root)] += 1
+        for count in counts:
+            self.assertTrue(200 < count < 300, counts)
+
+    def test_other_pages_stay_on_their_shard(self):
+        before = partition(self.pages, 3, self.root)
+        with open(self.pages[3][0], "a") as file:
+            file.write("x" * 5000)
+        new_path = os.path.join(self.root, "new", "index.md")
+        os.makedirs(os.path.dirname(new_path))
+        with open(new_path, "w") as file:
+            file.write("new")
+        after = partition(self.pages + [(new_path, new_path.replace(".md", ".html"))],
+                          3, self.root)
+        for number in range(3):
+            self.assertEqual([item for item in after[number] if item[0] != new_path],
+                             before[number])
+
+    def test_partition_ignores_page_order(self):
+        self.assertEqual(partition(self.pages, 3, self.root),
+                         partition(list(reversed(self.pages)), 3, self.root))
+
+    def test_select(self):
+        selected = [Shard(number, 3).select(self.pages, self.root) for number in (1, 2, 3)]
+        self.assertEqual(selected, partition(self.pages, 3, self.root))
+
+    def test_stable_hash_is_relative_to_root(self):
+        moved = os.path.join(self.tmp.name, "elsewhere")
+        self.assertEqual(stable_hash(os.path.join(self.root, "a", "b.md"), self.root),
+                         stable_hash(os.path.join(moved, "a", "b.md"), moved))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from staging import OutputWriter, clone_tree, staging_path, swap_into_place, write_file
+
+
+class TestStaging(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = os.path.join(self.tmp.name, "docs")
+        self.staging = staging_path(self.public)
+        self.write(os.path.join(self.public, "index.html"), "old")
+        self.write(os.path.join(self.public, "blog", "index.html"), "blog")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(text)
+
+    def read(self, path):
+        with open(path) as file:
+            return file.read()
+
+    def test_clone_is_independent(self):
+        clone_tree(self.public, self.staging)
+        self.assertEqual(self.read(os.path.join(self.staging, "blog", "index.html")), "blog")
+        write_file(os.path.join(self.staging, "index.html"), "new")
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "old")
+        self.assertEqual(self.read(os.path.join(self.staging, "index.html")), "new")
+
+    def test_swap_into_place(self):
+        clone_tree(self.public, self.staging)
+        write_file(os.path.join(self.staging, "index.html"), "new")
+        swap_into_place(self.staging, self.public)
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "new")
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["docs"])
+
+    def test_swap_into_missing(self):
+        os.mkdir(os.path.join(self.tmp.name, "site.staging"))
+        public = os.path.join(self.tmp.name, "site")
+        swap_into_place(staging_path(public), public)
+        self.assertTrue(os.path.isdir(public))
+
+    def test_output_writer(self):
+        dest = os.path.join(self.public, "a.html")
+        with OutputWriter(2) as writer:
+            writer.write(dest, "a")
+            writer.write(os.path.join(self.public, "b.html"), "b")
+        self.assertEqual(self.read(dest), "a")
+
+    def test_output_writer_streams_fragments(self):
+        threads = []
+
+        def fragments():
+            threads.append(threading.current_thread())
+            yield "<p>"
+            yield "a"
+            yield "</p>"
+
+        dest = os.path.join(self.public, "a.html")
+        with OutputWriter(1) as writer:
+            writer.write(dest, fragments())
+        self.assertEqual(self.read(dest), "<p>a</p>")
+        # rendered by the writer thread, not joined into a string beforehand
+        self.assertNotEqual(threads, [threading.current_thread()])
+
+    def test_output_writer_raises(self):
+        writer = OutputWriter(2)
+        writer.write(os.path.join(self.public, "missing", "a.html"), "a")
+        with self.assertRaises(FileNotFoundError):
+            writer.close()
+
+
+    def test_output_writer_bounds_pending_writes(self):
+        release = threading.Event()
+        written = []
+
+        def slow_write(dest_path, text):
+            release.wait()
+            written.append(text)
+
+        writer = OutputWriter(jobs=1, max_pending=2)
+        with mock.patch("staging.write_file", slow_write):
+            thread = threading.Thread(target=lambda: [writer.write("x", str(i)) for i in range(5)])
+            thread.start()
+            thread.join(0.2)
+            # two pages are pending, the third waits for one of them to be written
+            self.assertTrue(thread.is_alive())
+            self.assertEqual(written, [])
+            release.set()
+            thread.join()
+            writer.close()
+        self.assertEqual(written, ["0", "1", "2", "3", "4"])
+
+
+if __name__ == "__main__":
+    unittest.main()
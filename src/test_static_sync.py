@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+
+from manifest import BuildManifest
+from static_sync import link_or_copy, sync_file, sync_static_files
+
+
+class TestStaticSync(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.manifest_path = os.path.join(self.tmp.name, "manifest.json")
+        os.mkdir(self.public)
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "tom.png"), "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(text)
+
+    def read(self, path):
+        with open(path) as file:
+            return file.read()
+
+    def test_copy_mode(self):
+        src = os.path.join(self.static, "index.css")
+        dst = os.path.join(self.public, "index.css")
+        self.assertEqual(link_or_copy(src, dst, "copy"), "copy")
+        self.assertEqual(self.read(dst), "body {}")
+        self.assertFalse(os.path.samefile(src, dst))
+
+    def test_replacing_hardlink_keeps_source(self):
+        src = os.path.join(self.static, "index.css")
+        dst = os.path.join(self.public, "index.css")
+        if link_or_copy(src, dst, "hardlink") != "hardlink":
+            self.skipTest("hardlinks not supported")
+        other = os.path.join(self.tmp.name, "other.css")
+        self.write(other, "p {}")
+        link_or_copy(other, dst, "copy")
+        self.assertEqual(self.read(src), "body {}")
+        self.assertEqual(self.read(dst), "p {}")
+
+    def test_sync_tree(self):
+        counts = sync_static_files(self.static, self.public)
+        self.assertEqual(sum(counts.values()), 2)
+        self.assertEqual(self.read(os.path.join(self.public, "images", "tom.png")), "png")
+
+    def test_skips_unchanged(self):
+        manifest = BuildManifest(self.manifest_path, self.public)
+        sync_static_files(self.static, self.public, manifest, mode="copy")
+        manifest.save()
+
+        manifest = BuildManifest.load(self.manifest_path, self.public)
+        self.assertEqual(sync_static_files(self.static, self.public, manifest, mode="copy"),
+                         {"unchanged": 2})
+
+        # touched but identical content isn't copied either
+        src = os.path.join(self.static, "index.css")
+        os.utime(src, ns=(0, 0))
+        self.write(os.path.join(self.static, "images", "tom.png"), "new png")
+        counts = sync_static_files(self.static, self.public, manifest, mode="copy")
+        self.assertEqual(counts, {"copy": 1, "unchanged": 1})
+        self.assertEqual(self.read(os.path.join(self.public, "images", "tom.png")), "new png")
+        self.assertEqual(manifest.new[os.path.join("index.css")]["mtime"], 0)
+
+    def test_sync_file_missing_output(self):
+        src = os.path.join(self.static, "index.css")
+        dst = os.path.join(self.public, "index.css")
+        inputs, method = sync_file(src, dst, mode="copy")
+        os.remove(dst)
+        self.assertEqual(sync_file(src, dst, inputs, "copy"), (inputs, "copy"))
+
+    def test_sync_file_mode_change(self):
+        src = os.path.join(self.static, "index.css")
+        dst = os.path.join(self.public, "index.css")
+        inputs, method = sync_file(src, dst, mode="hardlink")
+        if method != "hardlink":
+            self.skipTest("hardlinks not supported")
+        self.assertEqual(sync_file(src, dst, inputs, "hardlink"), (inputs, None))
+        inputs, method = sync_file(src, dst, inputs, "copy")
+        self.assertEqual((method, inputs["mode"]), ("copy", "copy"))
+        self.assertFalse(os.path.samefile(src, dst))
+        self.assertEqual(sync_file(src, dst, inputs, "copy"), (inputs, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
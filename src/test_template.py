@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from template import Template, load_template, rebase_urls
+
+
+class TestTemplate(unittest.TestCase):
+    def test_rebase_urls(self):
+        self.assertEqual(
+            rebase_urls('<link href="/index.css"><img src="/a.png"><a href="https://x.com">', "/site/"),
+            '<link href="/site/index.css"><img src="/site/a.png"><a href="https://x.com">'
+        )
+
+    def test_compile(self):
+        template = Template('<title>{{ Title }}</title><link href="/a.css">{{Content}}', "/site/")
+        self.assertEqual(
+            template.parts,
+            ["<title>", ("Title", "{{ Title }}"), '</title><link href="/site/a.css">',
+             ("Content", "{{Content}}"), ""]
+        )
+        self.assertEqual(template.slots, {"Title", "Content"})
+
+    def test_render(self):
+        template = Template("<h1>{{ Title }}</h1><main>{{ Content }}</main>")
+        content = ParentNode("div", [LeafNode("b", "bold")])
+        self.assertEqual(
+            template.render({"Title": "Hello", "Content": content}),
+            "<h1>Hello</h1><main><div><b>bold</b></div></main>"
+        )
+
+    def test_render_unknown_slot(self):
+        template = Template("<p>{{ Unknown }}</p>")
+        self.assertEqual(template.render({}), "<p>{{ Unknown }}</p>")
+
+    def test_content_not_rebased(self):
+        # basepath is applied to the template only, page urls are rebased when nodes are built
+        template = Template('<a href="/">{{ Content }}</a>', "/site/")
+        content = LeafNode("code", 'href="/x"')
+        self.assertEqual(template.render({"Content": content}),
+                         '<a href="/site/"><code>href="/x"</code></a>')
+
+    def test_load_template_recompiles_changed_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as file:
+                file.write("one {{ Title }}")
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+            with open(path, "w") as file:
+                file.write("two {{ Title }} again")
+            self.assertEqual(load_template(path).render({"Title": "x"}), "two x again")
+
+
+if __name__ == "__main__":
+    unittest.main()
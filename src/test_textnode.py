@@ -71,6 +71,29 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
         self.assertEqual(html_node.props["src"], "www.boot.dev/boots")
         self.assertEqual(html_node.props["alt"], "This is a image node")
 
+    def test_link_basepath(self):
+        node = TextNode("This is a link node", TextType.LINK, "/blog/tom")
+        html_node = text_node_to_html_node(node, "/site/")
+        self.assertEqual(html_node.props["href"], "/site/blog/tom")
+
+    def test_image_basepath(self):
+        node = TextNode("This is a image node", TextType.IMAGE, "/images/tom.png")
+        html_node = text_node_to_html_node(node, "/site/")
+        self.assertEqual(html_node.props["src"], "/site/images/tom.png")
+
+    def test_external_link_basepath(self):
+        node = TextNode("This is a link node", TextType.LINK, "https://www.boot.dev")
+        html_node = text_node_to_html_node(node, "/site/")
+        self.assertEqual(html_node.props["href"], "https://www.boot.dev")
+
+    def test_text_escaped(self):
+        node = text_node_to_html_node(TextNode("if a < b && c", TextType.CODE))
+        self.assertEqual(node.to_html(), "<code>if a &lt; b &amp;&amp; c</code>")
+
+    def test_link_escaped(self):
+        node = text_node_to_html_node(TextNode("<Back", TextType.LINK, '/a"b'))
+        self.assertEqual(node.to_html(), '<a href="/a&quot;b">&lt;Back</a>')
+
     def test_invalid_type(self):
         node = TextNode("This is a image node", "INVALID", "www.boot.dev/boots")
         with self.assertRaises(Exception):
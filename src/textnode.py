@@ -1,6 +1,6 @@
 from enum import Enum
 
-from htmlnode import LeafNode
+from htmlnode import LeafNode, intern_leaf, escape_text
 
 class TextType(Enum):
     TEXT = "text"
@@ -10,7 +10,13 @@ class TextType(Enum):
     LINK = "link"
     IMAGE = "image"
 
+    # members are singletons, so identity hashing is enough and much faster
+    # than Enum's hash of the name when text types key the dispatch tables
+    __hash__ = object.__hash__
+
 class TextNode():
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -33,20 +39,37 @@ class TextNode():
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
     
 
-def text_node_to_html_node(text_node):
-    """ Return a LeafNode made from the text_node. """
-    match text_node.text_type:
-        case TextType.TEXT:
-            return LeafNode(None, text_node.text)
-        case TextType.BOLD:
-            return LeafNode("b", text_node.text)
-        case TextType.ITALIC:
-            return LeafNode("i", text_node.text)
-        case TextType.CODE:
-            return LeafNode("code", text_node.text)
+def rebase_url(url, basepath):
+    """ Return root-relative url prefixed with basepath, other urls as they are. """
+    if basepath == "/" or not url.startswith("/") or url.startswith("//"):
+        return url
+    return basepath + url[1:]
+
+
+# tags of the text types that become a plain LeafNode of their text
+TEXT_TYPE_TAGS = {
+    TextType.TEXT: None,
+    TextType.BOLD: "b",
+    TextType.ITALIC: "i",
+    TextType.CODE: "code",
+}
+
+
+def text_node_to_html_node(text_node, basepath="/"):
+    """ Return a LeafNode made from the text_node.
+     The text is escaped here, once. Urls and alt text go to props, which
+     are escaped when the node is rendered.
+     Root-relative link and image urls are prefixed with basepath.
+     """
+    text_type = text_node.text_type
+    tag = TEXT_TYPE_TAGS.get(text_type, text_type)
+    if tag is not text_type:
+        return intern_leaf(tag, escape_text(text_node.text))
+    match text_type:
         case TextType.LINK:
-            return LeafNode("a", text_node.text, {"href": text_node.url})
+            return LeafNode("a", escape_text(text_node.text),
+                            {"href": rebase_url(text_node.url, basepath)})
         case TextType.IMAGE:
-            return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+            return LeafNode("img", "", {"src": rebase_url(text_node.url, basepath), "alt": text_node.text})
         case _:
             raise Exception(f"unknown text type: {text_node.text_type}")